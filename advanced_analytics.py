@@ -1,31 +1,166 @@
-
+import numpy as np
 import pandas as pd
+from app.database import session_scope
+from app.sql_analytics import top_callers, cdr_scope
+from cdrintel.ingestion.msisdn import DEFAULT_COUNTRY
+
+# Column names across the normalized schema and older exports, in priority order
+CALLER_COLUMNS = ("caller", "msisdn", "MSISDN", "caller_id")
+CALLEE_COLUMNS = ("callee", "receiver", "other_party", "receiver_id")
+TIME_COLUMNS = ("timestamp", "start_time")
+
+NIGHT_HOURS = (0, 5)          # inclusive
+LONG_CALL_FACTOR = 2.0        # a call longer than this many times the caller's own mean
+BURST_THRESHOLD = 20          # calls in one clock hour
+
+# Score = sum of weight * signal. Long and night calls at 1.0 reproduce the
+# original score; the other signals are scaled to weigh in at similar levels.
+RED_FLAG_WEIGHTS = {
+    "long_calls": 1.0,
+    "night_calls": 1.0,
+    "international_ratio": 10.0,
+    "burst_hours": 5.0,
+    "distinct_counterparts": 0.1,
+}
+
+
+def _pick(df, candidates, required=True):
+    for column in candidates:
+        if column in df.columns:
+            return column
+    if required:
+        raise KeyError(f"none of the columns {', '.join(candidates)} found")
+    return None
+
+
+def _codes(values):
+    """int codes and distinct count; categoricals reuse their own codes."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(dtype=np.int64), len(values.cat.categories), values.cat.categories
+    codes, uniques = pd.factorize(values)
+    return codes.astype(np.int64), len(uniques), uniques
+
+
+def _timestamps(df):
+    column = _pick(df, TIME_COLUMNS)
+    values = df[column]
+    if not pd.api.types.is_datetime64_any_dtype(values.dtype):
+        values = pd.to_datetime(values, errors="coerce")
+    return values
+
+
+def _runs(keys):
+    """Distinct int64 keys and how often each occurs (sort + run lengths)."""
+    keys = np.sort(keys)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return keys[starts], np.diff(np.r_[starts, len(keys)])
+
+
+def _per_caller_distinct(caller, other, n_callers):
+    """Distinct `other` codes per caller code, via unique (caller, other) pairs."""
+    valid = (caller >= 0) & (other >= 0)
+    if not valid.any():
+        return np.zeros(n_callers, dtype=np.int64)
+    width = other.max() + 1
+    pairs, _ = _runs(caller[valid] * width + other[valid])
+    return np.bincount(pairs // width, minlength=n_callers)
+
 
 def temporal_alerts(df):
     alerts = {}
-    alerts['night_calls'] = df[df['start_time'].dt.hour.between(0,5)].shape[0]
-    alerts['burst_activity'] = df.groupby('caller').size().max()
+    hours = _timestamps(df).dt.hour
+    alerts['night_calls'] = int(hours.between(*NIGHT_HOURS).sum())
+    alerts['burst_activity'] = df.groupby(_pick(df, CALLER_COLUMNS), observed=True).size().max()
     return alerts
 
-def red_flag_scores(df):
-    scores = {}
-    for caller, g in df.groupby('caller'):
-        score = 0
-        score += g[g['duration'] > g['duration'].mean()*2].shape[0]
-        score += g[g['start_time'].dt.hour.between(0,5)].shape[0]
-        scores[caller] = score
-    return scores
-def compute_top_callers(case_id: str):
+
+def red_flag_scores(
+    df,
+    weights=None,
+    long_call_factor=LONG_CALL_FACTOR,
+    night_hours=NIGHT_HOURS,
+    burst_threshold=BURST_THRESHOLD,
+    home_country=DEFAULT_COUNTRY,
+):
     """
-    Wrapper for FastAPI compatibility.
-    Replace internals later with real DB logic.
+    Score every caller on per-caller red-flag signals and rank them.
+
+    Signals, each computed in one vectorized pass over integer caller codes:
+      long_calls            calls longer than long_call_factor x the caller's mean
+      night_calls           calls starting in night_hours
+      international_ratio   share of calls to numbers outside +home_country
+      burst_hours           clock hours with at least burst_threshold calls
+      distinct_counterparts numbers called
+
+    `weights` overrides entries of RED_FLAG_WEIGHTS. Returns a DataFrame with
+    one row per caller, the signals and `score`, highest score first.
     """
+    weights = {**RED_FLAG_WEIGHTS, **(weights or {})}
+    caller, n_callers, callers = _codes(df[_pick(df, CALLER_COLUMNS)])
+    observed = caller >= 0
+    caller = caller[observed]
+    calls = np.bincount(caller, minlength=n_callers)
+
+    # Long calls against the caller's own mean (NaN durations are skipped, like Series.mean)
+    duration = pd.to_numeric(df["duration"], errors="coerce").to_numpy(dtype=float)[observed]
+    has_duration = ~np.isnan(duration)
+    total = np.bincount(caller[has_duration], weights=duration[has_duration], minlength=n_callers)
+    counted = np.bincount(caller[has_duration], minlength=n_callers)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / counted
+    long_calls = np.bincount(caller, weights=duration > long_call_factor * mean[caller], minlength=n_callers)
+
+    # Night calls and clock-hour bursts
+    stamps = _timestamps(df).to_numpy(dtype="datetime64[ns]")[observed]
+    has_time = ~np.isnat(stamps)
+    hours = stamps[has_time].astype("datetime64[h]").astype(np.int64)
+    hour_of_day = hours % 24
+    night = (hour_of_day >= night_hours[0]) & (hour_of_day <= night_hours[1])
+    night_calls = np.bincount(caller[has_time], weights=night, minlength=n_callers)
+    if len(hours):
+        hour_code = hours - hours.min()
+        buckets, bucket_calls = _runs(caller[has_time] * (hour_code.max() + 1) + hour_code)
+        bursting = buckets[bucket_calls >= burst_threshold] // (hour_code.max() + 1)
+        burst_hours = np.bincount(bursting, minlength=n_callers)
+    else:
+        burst_hours = np.zeros(n_callers, dtype=np.int64)
+
+    # Counterparts: distinct numbers and the share outside the home country
+    callee_column = _pick(df, CALLEE_COLUMNS, required=False)
+    if callee_column is not None:
+        callee_values = df[callee_column][observed]
+        callee, _, _ = _codes(callee_values)
+        distinct = _per_caller_distinct(caller, callee, n_callers)
+        text = callee_values.astype("string")
+        international = (text.str.startswith("+") & ~text.str.startswith(f"+{home_country}")).fillna(False)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            ratio = np.bincount(caller, weights=international.to_numpy(dtype=bool), minlength=n_callers) / calls
+    else:
+        distinct = np.zeros(n_callers, dtype=np.int64)
+        ratio = np.zeros(n_callers)
+
+    scores = pd.DataFrame({
+        "caller": np.asarray(callers, dtype=object),
+        "calls": calls,
+        "long_calls": long_calls.astype(np.int64),
+        "night_calls": night_calls.astype(np.int64),
+        "international_ratio": np.nan_to_num(ratio),
+        "burst_hours": burst_hours,
+        "distinct_counterparts": distinct,
+    })
+    scores = scores[scores["calls"] > 0]
+    scores["score"] = sum(scores[signal] * weight for signal, weight in weights.items())
+    return scores.sort_values(["score", "caller"], ascending=[False, True], kind="stable").reset_index(drop=True)
+
+
+def compute_top_callers(case_id: str, start=None, end=None, top_n=10):
+    """
+    Top callers of one case, optionally within [start, end).
+    Counted in the database over the case's rows only.
+    """
+    with session_scope() as db:
+        counts = top_callers(db, top_n, cdr_scope(case_id, start, end))
     return {
         "case_id": case_id,
-        "top_callers": [
-            {"msisdn": "254700000001", "calls": 42},
-            {"msisdn": "254700000002", "calls": 31},
-            {"msisdn": "254700000003", "calls": 18}
-        ]
+        "top_callers": [{"msisdn": caller, "calls": calls} for caller, calls in counts.items()]
     }
-
@@ -1,28 +1,38 @@
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
-from app.models import CDR, AnalysisLog
-from datetime import datetime
+from app.database import session_scope
+from app.models import CDR
+from app.anomaly_store import store_anomalies
+from app.incremental_analytics import analyze_cdr_incremental
+from app.sql_analytics import analyze_cdr_sql, cdr_scope
+from app.burst_detection import detect_bursts
 import pandas as pd
 
 LONG_CALL_THRESHOLD = 3600  # 1 hour
 BURST_CALL_THRESHOLD = 20    # 20 calls/hour
 
-def analyze_cdr(db: Session):
-    # Load all CDRs
-    cdrs = db.query(CDR).all()
-    df = pd.DataFrame([{
-        "caller": c.caller,
-        "callee": c.callee,
-        "duration": c.duration,
-        "timestamp": c.timestamp,
-        "imei": c.imei,
-        "imsi": c.imsi,
-        "subscriber_id": c.subscriber_id
-    } for c in cdrs])
+FRAME_COLUMNS = [CDR.caller, CDR.callee, CDR.duration, CDR.timestamp, CDR.imei, CDR.imsi, CDR.subscriber_id]
 
+def load_cdr_frame(db: Session, scope=()):
+    # Load the CDRs in scope (all of them by default)
+    rows = db.execute(select(*FRAME_COLUMNS).where(*scope)).all()
+    return pd.DataFrame(rows, columns=[c.key for c in FRAME_COLUMNS])
+
+def run_detectors(df, burst_options=None):
+    """
+    Run every detector over an in-memory CDR DataFrame.
+
+    burst_options is passed to app.burst_detection.detect_bursts, e.g.
+    {'rolling': True, 'window_minutes': 30, 'caller_thresholds': {...}}.
+    The default is fixed clock-hour buckets, matching the sql and incremental modes.
+    """
     intelligence = {}
 
     # Top communicators
-    top_callers = df['caller'].value_counts().head(10).to_dict()
+    # Ties are broken by caller, as in the sql and incremental modes
+    counts = df['caller'].value_counts().rename_axis('caller').reset_index(name='count')
+    counts = counts.sort_values(['count', 'caller'], ascending=[False, True], kind='stable')
+    top_callers = dict(zip(counts['caller'].head(10), counts['count'].head(10)))
     intelligence['top_callers'] = top_callers
 
     # Long calls
@@ -30,9 +40,10 @@ def analyze_cdr(db: Session):
     intelligence['long_calls'] = long_calls.to_dict(orient='records')
 
     # Burst calls
-    df['hour'] = df['timestamp'].apply(lambda x: x.replace(minute=0, second=0, microsecond=0))
-    bursts = df.groupby(['caller','hour']).size().reset_index(name='call_count')
-    burst_calls = bursts[bursts['call_count'] >= BURST_CALL_THRESHOLD]
+    burst_options = {'threshold': BURST_CALL_THRESHOLD, **(burst_options or {})}
+    burst_calls = detect_bursts(df, **burst_options)
+    if not burst_options.get('rolling'):
+        burst_calls = burst_calls.rename(columns={'window_start': 'hour'})
     intelligence['burst_calls'] = burst_calls.to_dict(orient='records')
 
     # SIM swaps
@@ -45,17 +56,51 @@ def analyze_cdr(db: Session):
     burner_phones = imei_usage[imei_usage['subscriber_id'] > 1]
     intelligence['burner_phones'] = burner_phones.to_dict(orient='records')
 
-    # Save anomalies to AnalysisLog
-    for anomaly_type, records in intelligence.items():
-        if isinstance(records, list):
-            for record in records:
-                log = AnalysisLog(subscriber_id=record.get('caller', 'N/A'),
-                                  anomaly_type=anomaly_type,
-                                  details=record)
-                db.add(log)
-        else:  # dictionary
-            log = AnalysisLog(subscriber_id="N/A", anomaly_type=anomaly_type, details=records)
-            db.add(log)
-    db.commit()
+    return intelligence
+
+ANALYSIS_MODES = ("incremental", "sql", "pandas")
+
+def analyze_cdr(db: Session, mode: str = "incremental", case_id=None, start=None, end=None):
+    """
+    Run every detector and log the anomalies.
+
+    mode selects the execution strategy; all three return the same records:
+      incremental - fold rows added since the previous run into materialized
+                    aggregates (see app.incremental_analytics)
+      sql         - GROUP BY / HAVING queries pushed into the database
+                    (see app.sql_analytics)
+      pandas      - reload the cdr rows in scope into a DataFrame
+
+    case_id and the [start, end) time range restrict every detector to the
+    matching rows. The materialized aggregates cover the whole table, so a
+    scoped incremental run uses the sql queries instead.
+    """
+    scope = cdr_scope(case_id, start, end)
+    if mode == "incremental" and not scope:
+        intelligence = analyze_cdr_incremental(db, LONG_CALL_THRESHOLD, BURST_CALL_THRESHOLD)
+    elif mode in ("incremental", "sql"):
+        intelligence = analyze_cdr_sql(db, LONG_CALL_THRESHOLD, BURST_CALL_THRESHOLD, scope=scope)
+    elif mode == "pandas":
+        intelligence = run_detectors(load_cdr_frame(db, scope))
+    else:
+        raise ValueError(f"Unknown analysis mode: {mode}")
+
+    # Save anomalies to AnalysisLog, skipping ones already logged
+    store_anomalies(db, intelligence)
 
     return intelligence
+
+def data_version(db: Session):
+    """
+    Version of the cdr table for result caching. CDR rows are append-only
+    evidence and ids commit in id order (CDRBulkLoader serializes loads, see
+    app.ingestion.bulk_loader.CDR_LOAD_LOCK), so the highest visible id
+    identifies the table's contents: a load that commits later always
+    raises it.
+    """
+    return db.query(func.max(CDR.id)).scalar() or 0
+
+def analyze_cdr_job(mode: str = "incremental", case_id=None, start=None, end=None):
+    """analyze_cdr with its own session, for the background job queue."""
+    with session_scope() as db:
+        return analyze_cdr(db, mode=mode, case_id=case_id, start=start, end=end)
@@ -0,0 +1,140 @@
+import hashlib
+import json
+from datetime import datetime, date
+import pandas as pd
+from sqlalchemy import inspect, select, text
+from sqlalchemy.orm import Session
+from app.database import dialect_insert
+from app.models import AnalysisLog
+
+# Anomaly findings are persisted once. Each row carries a content hash of
+# (anomaly_type, subject, window); re-running the detectors over the same data
+# hits the unique constraint and inserts nothing.
+#
+# Tables created before content_hash existed are upgraded in place on first
+# use (create_all never alters an existing table); see upgrade_analysis_log.
+
+INSERT_BATCH_ROWS = 1000
+CONTENT_HASH_INDEX = "uq_analysis_log_content_hash"
+
+_upgraded = set()  # database URLs whose analysis_log is known to be current
+
+# Record field that identifies who/what an anomaly is about, in priority order
+SUBJECT_FIELDS = ("caller", "imsi", "imei", "subscriber_id")
+# Record fields that place an anomaly in time
+WINDOW_FIELDS = ("hour", "window_start", "window_end", "timestamp")
+
+
+def _json_safe(value):
+    if isinstance(value, dict):
+        return {str(k): _json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(v) for v in value]
+    if value is None or (pd.api.types.is_scalar(value) and pd.isna(value)):
+        return None
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, "item"):  # numpy scalars
+        return value.item()
+    return value
+
+
+def anomaly_subject(record):
+    for field in SUBJECT_FIELDS:
+        if record.get(field) is not None:
+            return str(record[field])
+    return "N/A"
+
+
+def content_hash(anomaly_type, subject, window):
+    payload = json.dumps([anomaly_type, subject, window], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _log_rows(intelligence):
+    for anomaly_type, records in intelligence.items():
+        if isinstance(records, list):
+            for record in records:
+                details = _json_safe(record)
+                subject = anomaly_subject(details)
+                window = {f: details[f] for f in WINDOW_FIELDS if f in details}
+                yield {
+                    "subscriber_id": subject,
+                    "anomaly_type": anomaly_type,
+                    "details": details,
+                    "content_hash": content_hash(anomaly_type, subject, window),
+                }
+        else:  # dictionary summary, e.g. top_callers: logged again only when it changes
+            details = _json_safe(records)
+            yield {
+                "subscriber_id": "N/A",
+                "anomaly_type": anomaly_type,
+                "details": details,
+                "content_hash": content_hash(anomaly_type, "N/A", details),
+            }
+
+
+def upgrade_analysis_log(bind):
+    """
+    Add content_hash, its unique index and the lookup indexes to an
+    analysis_log table created before them. Rows already logged keep a NULL
+    hash, so each current anomaly is logged once more and deduplicated from
+    then on. Does nothing on an up-to-date or missing table.
+    """
+    table = AnalysisLog.__table__
+    with bind.connect() as conn:
+        if not inspect(conn).has_table(table.name):
+            return
+        columns = {column["name"] for column in inspect(conn).get_columns(table.name)}
+        if "content_hash" not in columns:
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN content_hash VARCHAR(64)"))
+            conn.execute(text(f"CREATE UNIQUE INDEX {CONTENT_HASH_INDEX} ON {table.name} (content_hash)"))
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+        conn.commit()
+
+
+def store_anomalies(db: Session, intelligence, batch_rows=INSERT_BATCH_ROWS) -> int:
+    """
+    Bulk insert detector output into analysis_log, skipping anomalies already stored.
+
+    Returns the number of new rows.
+    """
+    bind = db.get_bind()
+    if str(bind.url) not in _upgraded:
+        upgrade_analysis_log(bind)
+        _upgraded.add(str(bind.url))
+    stmt = dialect_insert(bind, AnalysisLog.__table__).on_conflict_do_nothing(
+        index_elements=["content_hash"]
+    )
+    now = datetime.utcnow()
+    inserted = 0
+    batch = {}
+    for row in _log_rows(intelligence):
+        row["timestamp"] = now
+        batch[row["content_hash"]] = row  # also dedups within the run
+        if len(batch) >= batch_rows:
+            inserted += db.execute(stmt, list(batch.values())).rowcount
+            batch = {}
+    if batch:
+        inserted += db.execute(stmt, list(batch.values())).rowcount
+    db.commit()
+    return inserted
+
+
+def query_anomalies(db: Session, subscriber_id=None, anomaly_type=None, since=None, until=None,
+                    limit=100, offset=0):
+    """
+    Stored anomalies, newest first, filtered on the indexed columns.
+    """
+    query = select(AnalysisLog)
+    if subscriber_id is not None:
+        query = query.where(AnalysisLog.subscriber_id == subscriber_id)
+    if anomaly_type is not None:
+        query = query.where(AnalysisLog.anomaly_type == anomaly_type)
+    if since is not None:
+        query = query.where(AnalysisLog.timestamp >= since)
+    if until is not None:
+        query = query.where(AnalysisLog.timestamp < until)
+    query = query.order_by(AnalysisLog.timestamp.desc(), AnalysisLog.id.desc()).limit(limit).offset(offset)
+    return db.execute(query).scalars().all()
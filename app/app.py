@@ -1,18 +1,13 @@
 import dash
 from dash import html, dcc, Input, Output, State
 import dash_bootstrap_components as dbc
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
+from app.database import session_scope
 from models import User
 from utils import create_jwt, generate_otp, verify_jwt
 from components.login import login_layout
 from components.otp import otp_layout
 from components.dashboard_views import admin_dashboard, investigator_dashboard
 
-engine = create_engine("sqlite:///cdr_intel.db")
-Session = sessionmaker(bind=engine)
-session = Session()
-
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
 server = app.server
 app.layout = html.Div(id="page-content")  # single-page app
@@ -37,13 +32,15 @@ def display_login(_):
 def handle_login(n_clicks, username, password):
     if not n_clicks:
         return dash.no_update, ""
-    user = session.query(User).filter_by(username=username, password=password).first()
-    if not user:
-        return dash.no_update, "Invalid username or password"
-    TEMP_STORE["jwt"] = create_jwt(user)
+    with session_scope() as session:
+        user = session.query(User).filter_by(username=username, password=password).first()
+        if not user:
+            return dash.no_update, "Invalid username or password"
+        TEMP_STORE["jwt"] = create_jwt(user)
+        username = user.username
     TEMP_STORE["otp"] = generate_otp()
     # In real app: send OTP via SMS or email
-    print(f"DEBUG: OTP for {user.username} is {TEMP_STORE['otp']}")
+    print(f"DEBUG: OTP for {username} is {TEMP_STORE['otp']}")
     return otp_layout, ""
 
 # Handle OTP verification -> show role-based dashboard
@@ -1,6 +1,5 @@
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from app.database import SessionLocal
+from app.database import session_scope
 from app.models import OTP
 import random
 
@@ -12,8 +11,7 @@ def generate_otp(user_id: int, expires_in_minutes: int = 5) -> str:
     otp_code = str(random.randint(100000, 999999))
     expiry_time = datetime.utcnow() + timedelta(minutes=expires_in_minutes)
 
-    db: Session = SessionLocal()
-    try:
+    with session_scope() as db:
         otp_entry = OTP(
             user_id=user_id,
             otp_code=otp_code,
@@ -21,9 +19,5 @@ def generate_otp(user_id: int, expires_in_minutes: int = 5) -> str:
             is_used=False
         )
         db.add(otp_entry)
-        db.commit()
-        db.refresh(otp_entry)
-    finally:
-        db.close()
 
     return otp_code
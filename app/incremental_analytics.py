@@ -0,0 +1,146 @@
+from datetime import datetime
+import pandas as pd
+from sqlalchemy import select, func, update
+from sqlalchemy.orm import Session
+from app.database import dialect_insert
+from app.models import CDR, AnalyticsWatermark, CallerCount, CallerHourCount, ImsiImei, ImeiSubscriber
+
+WATERMARK_NAME = "cdr_aggregates"
+FOLD_BATCH_ROWS = 100_000
+
+FOLD_COLUMNS = [CDR.id, CDR.caller, CDR.timestamp, CDR.imei, CDR.imsi, CDR.subscriber_id]
+
+
+def _add_counts(db: Session, table, keys, counts: pd.DataFrame):
+    if counts.empty:
+        return
+    stmt = dialect_insert(db.get_bind(), table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=keys,
+        set_={"call_count": table.c.call_count + stmt.excluded.call_count},
+    )
+    db.execute(stmt, counts.to_dict(orient="records"))
+
+
+def _add_pairs(db: Session, table, keys, pairs: pd.DataFrame):
+    if pairs.empty:
+        return
+    stmt = dialect_insert(db.get_bind(), table).on_conflict_do_nothing(index_elements=keys)
+    db.execute(stmt, pairs.to_dict(orient="records"))
+
+
+def _fold_batch(db: Session, df: pd.DataFrame):
+    caller_counts = df['caller'].value_counts().rename_axis('caller').reset_index(name='call_count')
+    _add_counts(db, CallerCount.__table__, ['caller'], caller_counts)
+
+    df['hour'] = pd.to_datetime(df['timestamp'], errors='coerce').dt.floor('h')
+    hour_counts = df.groupby(['caller', 'hour']).size().reset_index(name='call_count')
+    _add_counts(db, CallerHourCount.__table__, ['caller', 'hour'], hour_counts)
+
+    imsi_imei = df[['imsi', 'imei']].dropna().drop_duplicates()
+    _add_pairs(db, ImsiImei.__table__, ['imsi', 'imei'], imsi_imei)
+
+    imei_subscriber = df[['imei', 'subscriber_id']].dropna().drop_duplicates()
+    _add_pairs(db, ImeiSubscriber.__table__, ['imei', 'subscriber_id'], imei_subscriber)
+
+
+def refresh_aggregates(db: Session, batch_rows=FOLD_BATCH_ROWS) -> int:
+    """
+    Fold CDR rows added since the last run into the materialized aggregates.
+
+    Returns the number of rows folded. The watermark is advanced with a
+    compare-and-set, so a concurrent refresh that got there first causes this
+    one to roll back rather than double count.
+
+    The watermark is the highest CDR id folded. That is only safe because
+    CDR ids commit in id order: CDRBulkLoader serializes loads (see
+    app.ingestion.bulk_loader.CDR_LOAD_LOCK), so no row below a visible id
+    can commit later and be skipped. Rows inserted into cdr any other way
+    break that guarantee.
+    """
+    watermark = db.get(AnalyticsWatermark, WATERMARK_NAME)
+    if watermark is None:
+        watermark = AnalyticsWatermark(name=WATERMARK_NAME, last_cdr_id=0)
+        db.add(watermark)
+        db.flush()
+    start_id = watermark.last_cdr_id
+
+    last_id = start_id
+    folded = 0
+    while True:
+        # Keyset pagination on the primary key keeps every batch an index range scan
+        rows = db.execute(
+            select(*FOLD_COLUMNS).where(CDR.id > last_id).order_by(CDR.id).limit(batch_rows)
+        ).all()
+        if not rows:
+            break
+        batch = pd.DataFrame(rows, columns=[c.key for c in FOLD_COLUMNS])
+        _fold_batch(db, batch)
+        last_id = int(batch['id'].iloc[-1])
+        folded += len(batch)
+
+    if folded:
+        advanced = db.execute(
+            update(AnalyticsWatermark)
+            .where(AnalyticsWatermark.name == WATERMARK_NAME, AnalyticsWatermark.last_cdr_id == start_id)
+            .values(last_cdr_id=last_id, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        if advanced.rowcount != 1:
+            db.rollback()
+            return 0
+    db.commit()
+    return folded
+
+
+def read_intelligence(db: Session, long_call_threshold, burst_call_threshold, top_n=10):
+    """
+    Build the analyze_cdr result from the materialized aggregates.
+
+    Output matches the full-scan pandas detectors record for record.
+    """
+    intelligence = {}
+
+    top_rows = db.execute(
+        select(CallerCount.caller, CallerCount.call_count)
+        .order_by(CallerCount.call_count.desc(), CallerCount.caller)
+        .limit(top_n)
+    ).all()
+    intelligence['top_callers'] = {caller: count for caller, count in top_rows}
+
+    long_rows = db.execute(
+        select(CDR.caller, CDR.callee, CDR.duration, CDR.timestamp, CDR.imei, CDR.imsi, CDR.subscriber_id)
+        .where(CDR.duration >= long_call_threshold)
+        .order_by(CDR.id)
+    ).mappings().all()
+    intelligence['long_calls'] = [dict(r) for r in long_rows]
+
+    burst_rows = db.execute(
+        select(CallerHourCount.caller, CallerHourCount.hour, CallerHourCount.call_count)
+        .where(CallerHourCount.call_count >= burst_call_threshold)
+        .order_by(CallerHourCount.caller, CallerHourCount.hour)
+    ).mappings().all()
+    intelligence['burst_calls'] = [dict(r) for r in burst_rows]
+
+    swap_rows = db.execute(
+        select(ImsiImei.imsi, func.count().label('imei'))
+        .group_by(ImsiImei.imsi)
+        .having(func.count() > 1)
+        .order_by(ImsiImei.imsi)
+    ).mappings().all()
+    intelligence['sim_swaps'] = [dict(r) for r in swap_rows]
+
+    burner_rows = db.execute(
+        select(ImeiSubscriber.imei, func.count().label('subscriber_id'))
+        .group_by(ImeiSubscriber.imei)
+        .having(func.count() > 1)
+        .order_by(ImeiSubscriber.imei)
+    ).mappings().all()
+    intelligence['burner_phones'] = [dict(r) for r in burner_rows]
+
+    return intelligence
+
+
+def analyze_cdr_incremental(db: Session, long_call_threshold, burst_call_threshold):
+    refresh_aggregates(db)
+    return read_intelligence(db, long_call_threshold, burst_call_threshold)
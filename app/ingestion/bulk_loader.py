@@ -0,0 +1,213 @@
+import io
+import pandas as pd
+from sqlalchemy import func, select, text
+from app.database import engine as default_engine
+from app.models import CDR
+
+# Normalized pipeline column -> cdr table column
+SOURCE_COLUMN_MAP = {
+    "MSISDN": "caller",
+    "IMEI": "imei",
+    "IMSI": "imsi",
+    "other_party": "callee",
+    "receiver": "callee",
+}
+
+CDR_TABLE = CDR.__table__
+CDR_COLUMNS = [c.name for c in CDR_TABLE.columns if c.name != "id"]
+
+DEFAULT_BATCH_ROWS = 50_000
+
+# Loads into the cdr table run one at a time, so CDR ids become visible in
+# id order: once a reader sees id N, no transaction can still commit a row
+# below N. app.incremental_analytics and the analytics result cache rely on
+# this to use the highest id as a watermark. SQLite already serializes
+# writers; on PostgreSQL ids come from a sequence and concurrent loads would
+# commit them out of order, so each load holds this transaction-level
+# advisory lock until it commits or rolls back.
+CDR_LOAD_LOCK = 0x43445231  # "CDR1"
+
+# Dropping the secondary indexes and rebuilding them once only pays off for
+# an initial load, or one that is large next to what the table already
+# holds. For an incremental load into a big table the rebuild is O(table)
+# and, on PostgreSQL, holds an ACCESS EXCLUSIVE lock that blocks readers.
+DEFER_INDEXES_MAX_TABLE_ROWS = 100_000  # tables this small are always cheap to re-index
+DEFER_INDEXES_MIN_LOAD_RATIO = 0.5      # otherwise: expected rows / rows already in the table
+
+
+def to_cdr_frame(batch):
+    """
+    Align a normalized DataFrame (or Arrow table/batch) to the cdr table columns.
+
+    Unknown columns are dropped and missing ones are filled with nulls.
+    """
+    if hasattr(batch, "to_pandas"):
+        batch = batch.to_pandas()
+    renames = {}
+    for source, target in SOURCE_COLUMN_MAP.items():
+        if source in batch.columns and target not in batch.columns and target not in renames.values():
+            renames[source] = target
+    df = batch.rename(columns=renames)
+    df = df.reindex(columns=CDR_COLUMNS)
+    df["duration"] = pd.to_numeric(df["duration"], errors="coerce").round().astype("Int64")
+    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+    return df
+
+
+class CDRBulkLoader:
+    """
+    Loads normalized batches into the cdr table inside a single transaction.
+
+    PostgreSQL receives rows through COPY FROM STDIN; every other backend uses
+    batched executemany. The loader is also a streaming sink, so it can be
+    passed straight to ingest_to_sink.
+
+    With defer_indexes=True the non-unique secondary indexes are dropped for
+    the duration of the load and rebuilt once at the end; with False they
+    are maintained row by row. The default (None) defers only when the table
+    is small or `expected_rows` is large relative to it. Primary key and
+    unique indexes are never dropped.
+
+    Loads are serialized (see CDR_LOAD_LOCK); every row of the cdr table
+    must be written through this loader for the id watermark to hold.
+
+    `upload` (an Upload record) stamps every row with its case_id and id, so
+    the rows can be analyzed per case.
+
+        with CDRBulkLoader(upload=upload) as loader:
+            for batch in stream_cdr_files([upload.stored_path]):
+                loader.write(batch)
+    """
+
+    def __init__(self, engine=None, batch_rows=DEFAULT_BATCH_ROWS, defer_indexes=None, upload=None, expected_rows=None):
+        self.engine = engine or default_engine
+        self.batch_rows = batch_rows
+        self.defer_indexes = defer_indexes
+        self.expected_rows = expected_rows
+        self.upload = upload
+        self.rows_loaded = 0
+        self._conn = None
+        self._trans = None
+        self._dropped_indexes = []
+
+    @property
+    def uses_copy(self):
+        return self.engine.dialect.name == "postgresql"
+
+    def __enter__(self):
+        self.begin()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def begin(self):
+        if self._conn is not None:
+            return
+        self._conn = self.engine.connect()
+        self._trans = self._conn.begin()
+        if self.uses_copy:
+            self._conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": CDR_LOAD_LOCK})
+        if self._should_defer_indexes():
+            for index in CDR_TABLE.indexes:
+                if index.unique:
+                    continue
+                index.drop(bind=self._conn, checkfirst=True)
+                self._dropped_indexes.append(index)
+
+    def _should_defer_indexes(self):
+        if self.defer_indexes is not None:
+            return self.defer_indexes
+        # max(id) reads one end of the primary key; it can only overestimate
+        table_rows = self._conn.execute(select(func.max(CDR_TABLE.c.id))).scalar() or 0
+        if table_rows <= DEFER_INDEXES_MAX_TABLE_ROWS:
+            return True
+        if self.expected_rows is None:
+            return False
+        return self.expected_rows >= DEFER_INDEXES_MIN_LOAD_RATIO * table_rows
+
+    def write(self, batch):
+        self.begin()
+        df = to_cdr_frame(batch)
+        if self.upload is not None:
+            df["case_id"] = self.upload.case_id
+            df["upload_id"] = self.upload.id
+        for start in range(0, len(df), self.batch_rows):
+            part = df.iloc[start:start + self.batch_rows]
+            if self.uses_copy:
+                self._copy(part)
+            else:
+                self._executemany(part)
+            self.rows_loaded += len(part)
+
+    def close(self):
+        """Rebuild deferred indexes and commit the load."""
+        if self._conn is None:
+            return
+        try:
+            for index in self._dropped_indexes:
+                index.create(bind=self._conn, checkfirst=True)
+            self._trans.commit()
+        finally:
+            self._release()
+
+    def abort(self):
+        """Roll back everything written so far and restore any dropped indexes."""
+        if self._conn is None:
+            return
+        try:
+            self._trans.rollback()
+            # pysqlite commits DDL issued before the first insert, so on
+            # SQLite the drops survive the rollback; elsewhere this is a no-op
+            for index in self._dropped_indexes:
+                index.create(bind=self._conn, checkfirst=True)
+            if self._conn.in_transaction():
+                self._conn.commit()
+        finally:
+            self._release()
+
+    def _release(self):
+        self._conn.close()
+        self._conn = None
+        self._trans = None
+        self._dropped_indexes = []
+
+    def _executemany(self, df):
+        records = df.astype(object).where(df.notna(), None).to_dict(orient="records")
+        if records:
+            self._conn.execute(CDR_TABLE.insert(), records)
+
+    def _copy(self, df):
+        buffer = io.StringIO()
+        df.to_csv(buffer, index=False, header=False, date_format="%Y-%m-%d %H:%M:%S.%f")
+        buffer.seek(0)
+        sql = f"COPY {CDR_TABLE.name} ({', '.join(CDR_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+        cursor = self._conn.connection.dbapi_connection.cursor()
+        try:
+            if hasattr(cursor, "copy_expert"):  # psycopg2
+                cursor.copy_expert(sql, buffer)
+            else:  # psycopg 3
+                with cursor.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
+        finally:
+            cursor.close()
+
+
+def bulk_load_cdr(batches, engine=None, batch_rows=DEFAULT_BATCH_ROWS, defer_indexes=None, upload=None,
+                  expected_rows=None):
+    """
+    Load an iterable of normalized DataFrames/Arrow batches into the cdr table,
+    linked to `upload` when given. See CDRBulkLoader for `defer_indexes` and
+    `expected_rows`.
+
+    Returns the number of rows inserted.
+    """
+    with CDRBulkLoader(engine=engine, batch_rows=batch_rows, defer_indexes=defer_indexes, upload=upload,
+                       expected_rows=expected_rows) as loader:
+        for batch in batches:
+            loader.write(batch)
+    return loader.rows_loaded
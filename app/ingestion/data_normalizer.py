@@ -1,13 +1,18 @@
 import pandas as pd
+from cdrintel.ingestion.msisdn import canonicalize_msisdn, DEFAULT_COUNTRY
 
-def normalize_data(df):
-    # Remove duplicates
-    df = df.drop_duplicates()
+PHONE_COLUMNS = ("MSISDN", "caller", "callee", "other_party")
 
-    # Standardize phone numbers
-    df['MSISDN'] = df['MSISDN'].astype(str).str.replace(r'\D', '', regex=True)
+def normalize_data(df, default_country=DEFAULT_COUNTRY):
+    # Standardize phone numbers to E.164
+    for column in PHONE_COLUMNS:
+        if column in df.columns:
+            df[column] = canonicalize_msisdn(df[column], default_country)
 
     # Convert timestamps
     df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
 
+    # Remove duplicates, including ones that differed only in number format
+    df = df.drop_duplicates()
+
     return df
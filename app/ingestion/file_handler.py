@@ -19,13 +19,54 @@ import pandas as pd
 from PyPDF2 import PdfReader
 from bs4 import BeautifulSoup
 import zipfile
+from cdrintel.ingestion.csv_reader import read_cdr_csv, iter_cdr_csv
 
 def parse_csv(file_path):
-    return pd.read_csv(file_path)
+    return read_cdr_csv(file_path)
 
 def parse_excel(file_path):
     return pd.read_excel(file_path)
 
+def iter_csv_chunks(source, chunk_rows):
+    """
+    Yield typed DataFrames of at most `chunk_rows` rows from a CSV path or file object.
+    """
+    yield from iter_cdr_csv(source, chunk_rows)
+
+def iter_excel_chunks(source, chunk_rows):
+    """
+    Yield DataFrames of at most `chunk_rows` rows from the first sheet of a workbook.
+
+    .xlsx files are streamed row by row through openpyxl's read-only mode;
+    legacy .xls files have no streaming reader and are loaded whole, then sliced.
+    """
+    name = getattr(source, "name", source)
+    if str(name).lower().endswith(".xls"):
+        df = pd.read_excel(source)
+        for start in range(0, len(df), chunk_rows):
+            yield df.iloc[start:start + chunk_rows].reset_index(drop=True)
+        return
+
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c) for c in header]
+        buffer = []
+        for row in rows:
+            buffer.append(row)
+            if len(buffer) >= chunk_rows:
+                yield pd.DataFrame(buffer, columns=columns)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=columns)
+    finally:
+        workbook.close()
+
 def parse_pdf(file_path):
     reader = PdfReader(file_path)
     text_data = []
@@ -41,6 +82,37 @@ def parse_html(file_path):
     df_list = [pd.read_html(str(table))[0] for table in tables]
     return pd.concat(df_list, ignore_index=True)
 
+def iter_zip_chunks(file_path, chunk_rows):
+    """
+    Yield (member_name, DataFrame) chunks for every CSV/Excel member of a ZIP archive.
+
+    Members are read straight out of the archive, nothing is extracted to disk.
+    """
+    with zipfile.ZipFile(file_path, 'r') as zip_ref:
+        for info in zip_ref.infolist():
+            if info.is_dir():
+                continue
+            member_type = identify_file_type(info.filename)
+            if member_type == 'csv':
+                reader = iter_csv_chunks
+            elif member_type == 'excel':
+                reader = iter_excel_chunks
+            else:
+                continue
+            with zip_ref.open(info) as member:
+                for chunk in reader(member, chunk_rows):
+                    yield info.filename, chunk
+
+def iter_zip_member_chunks(file_path, member, chunk_rows):
+    """
+    Yield DataFrame chunks of one CSV/Excel member of a ZIP archive, read in place.
+    """
+    member_type = identify_file_type(member)
+    reader = iter_csv_chunks if member_type == 'csv' else iter_excel_chunks
+    with zipfile.ZipFile(file_path, 'r') as zip_ref:
+        with zip_ref.open(member) as f:
+            yield from reader(f, chunk_rows)
+
 def extract_zip(file_path):
     with zipfile.ZipFile(file_path, 'r') as zip_ref:
         zip_ref.extractall("temp_extracted")
@@ -0,0 +1,105 @@
+import logging
+import os
+import shutil
+import tempfile
+import uuid
+import zipfile
+import pyarrow.parquet as pq
+from app.ingestion.file_handler import identify_file_type, iter_zip_member_chunks
+from app.ingestion.streaming import iter_raw_chunks, ParquetSink, DEFAULT_CHUNK_ROWS
+from app.ingestion.column_standardizer import standardize_columns
+from app.ingestion.data_normalizer import normalize_data
+from cdrintel.ingestion.scheduler import run_tasks
+
+logger = logging.getLogger(__name__)
+
+# Parallel ingestion: every file, and every CSV/Excel member of every ZIP, is
+# a separate task. Workers stream their source chunk by chunk through
+# standardize_columns/normalize_data into a Parquet spool file, so a worker
+# holds one chunk at a time; the parent then streams each spool into the sink.
+# A column whose inferred type changes between chunks makes the spool roll
+# over to a new part file (see ParquetSink), so no rows are lost to it.
+
+
+class IngestionError(Exception):
+    """Some files or ZIP members could not be ingested; `errors` maps each to its message."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(f"{len(errors)} file(s) failed: " + "; ".join(f"{k}: {v}" for k, v in errors.items()))
+
+
+def expand_tasks(file_paths):
+    """(path, zip_member) tasks; zip_member is None for plain files."""
+    tasks = []
+    for path in file_paths:
+        if identify_file_type(path) == 'zip':
+            with zipfile.ZipFile(path, 'r') as zip_ref:
+                for info in zip_ref.infolist():
+                    if not info.is_dir() and identify_file_type(info.filename) in ('csv', 'excel'):
+                        tasks.append((path, info.filename))
+        else:
+            tasks.append((path, None))
+    return tasks
+
+
+def _spool_task(task, chunk_rows, spool_dir):
+    path, member = task
+    if member is None:
+        chunks = iter_raw_chunks(path, chunk_rows)
+    else:
+        chunks = iter_zip_member_chunks(path, member, chunk_rows)
+
+    spool_path = os.path.join(spool_dir, f"{uuid.uuid4().hex}.parquet")
+    sink = ParquetSink(spool_path)
+    rows = 0
+    try:
+        for chunk in chunks:
+            if chunk.empty:
+                continue
+            batch = normalize_data(standardize_columns(chunk))
+            sink.write(batch)
+            rows += len(batch)
+    finally:
+        sink.close()
+    return (sink.paths if rows else []), rows
+
+
+def parallel_ingest(file_paths, sink, max_workers=None, chunk_rows=DEFAULT_CHUNK_ROWS, spool_dir=None):
+    """
+    Parse and normalize files across a process pool and write every batch to `sink`.
+
+    A file or ZIP member that fails is logged and skipped; check the
+    "errors" of the returned report. Returns a report dict:
+    {"rows": int, "tasks": int, "errors": {"path[:member]": message}}.
+    """
+    own_spool = spool_dir is None
+    spool_dir = spool_dir or tempfile.mkdtemp(prefix="cdr_spool_")
+    report = {"rows": 0, "tasks": 0, "errors": {}}
+    try:
+        tasks = expand_tasks(file_paths)
+        for task, result, error in run_tasks(_spool_task, tasks, chunk_rows, spool_dir, max_workers=max_workers):
+            report["tasks"] += 1
+            if error is not None:
+                name = task[0] if task[1] is None else f"{task[0]}:{task[1]}"
+                logger.warning("Skipping %s: %s", name, error)
+                report["errors"][name] = str(error)
+                continue
+            spool_paths, rows = result
+            for spool_path in spool_paths:
+                for batch in pq.ParquetFile(spool_path).iter_batches(batch_size=chunk_rows):
+                    sink.write(batch.to_pandas())
+                os.remove(spool_path)
+            report["rows"] += rows
+    except BaseException:
+        abort = getattr(sink, "abort", None)
+        if abort is not None:
+            abort()
+        else:
+            sink.close()
+        raise
+    finally:
+        if own_spool:
+            shutil.rmtree(spool_dir, ignore_errors=True)
+    sink.close()
+    return report
@@ -0,0 +1,174 @@
+import os
+import pandas as pd
+from app.ingestion.file_handler import (
+    identify_file_type, iter_csv_chunks, iter_excel_chunks, iter_zip_chunks, parse_pdf, parse_html
+)
+from app.ingestion.column_standardizer import standardize_columns
+from app.ingestion.data_normalizer import normalize_data
+
+# Rows held in memory per batch. Peak memory is roughly chunk_rows * row width,
+# independent of how large the source files are.
+DEFAULT_CHUNK_ROWS = 100_000
+
+
+def iter_raw_chunks(file_path, chunk_rows):
+    """Yield raw (not yet standardized) DataFrame chunks of one source file."""
+    file_type = identify_file_type(file_path)
+    if file_type == 'csv':
+        yield from iter_csv_chunks(file_path, chunk_rows)
+    elif file_type == 'excel':
+        yield from iter_excel_chunks(file_path, chunk_rows)
+    elif file_type == 'zip':
+        for _, chunk in iter_zip_chunks(file_path, chunk_rows):
+            yield chunk
+    elif file_type in ('pdf', 'html'):
+        # Text extracts are small; parse whole and slice to keep batch sizes uniform
+        df = parse_pdf(file_path) if file_type == 'pdf' else parse_html(file_path)
+        for start in range(0, len(df), chunk_rows):
+            yield df.iloc[start:start + chunk_rows].reset_index(drop=True)
+
+
+def stream_cdr_files(file_paths, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Yield standardized and normalized CDR batches of at most `chunk_rows` rows.
+
+    Files are read lazily one chunk at a time, so only one batch per call is
+    ever resident. Duplicates are dropped within each batch only.
+    """
+    for file_path in file_paths:
+        for chunk in iter_raw_chunks(file_path, chunk_rows):
+            if chunk.empty:
+                continue
+            chunk = standardize_columns(chunk)
+            yield normalize_data(chunk)
+
+
+def ingest_to_sink(file_paths, sink, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Stream every file into `sink` and close it. Returns the number of rows written.
+
+    If ingestion fails the sink is aborted instead (when it supports abort()).
+    """
+    total = 0
+    try:
+        for batch in stream_cdr_files(file_paths, chunk_rows=chunk_rows):
+            sink.write(batch)
+            total += len(batch)
+    except BaseException:
+        # Transactional sinks (e.g. CDRBulkLoader) must not commit a partial load
+        abort = getattr(sink, "abort", None)
+        if abort is not None:
+            abort()
+        else:
+            sink.close()
+        raise
+    sink.close()
+    return total
+
+
+# =====================================================
+# SINKS
+# =====================================================
+# A sink is any object with write(df) and close(), plus an optional abort()
+# that discards a partially written load. The cdr table is loaded through
+# app.ingestion.bulk_loader.CDRBulkLoader.
+
+class MemorySink:
+    """Collects batches in memory; use for small cases and tests."""
+
+    def __init__(self):
+        self.batches = []
+
+    def write(self, df):
+        self.batches.append(df)
+
+    def close(self):
+        pass
+
+    def to_frame(self):
+        if not self.batches:
+            return pd.DataFrame()
+        return pd.concat(self.batches, ignore_index=True)
+
+
+class ParquetSink:
+    """
+    Appends batches as row groups of a Parquet file.
+
+    Each batch is cast to the schema of the file being written. A batch that
+    does not fit it (a column that changed type between chunks, e.g. all-null
+    float at first and text later, or a column that was not there before)
+    starts a new part file with the batch's own schema instead of being
+    dropped. `paths` lists every file written, in order.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.paths = []
+        self._writer = None
+
+    def write(self, df):
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._writer is not None:
+            conformed = self._conform(table)
+            if conformed is not None:
+                self._writer.write_table(conformed)
+                return
+            self.close()
+        self._open(table.schema)
+        self._writer.write_table(table)
+
+    def _open(self, schema):
+        import pyarrow.parquet as pq
+
+        if self.paths:
+            root, ext = os.path.splitext(self.path)
+            path = f"{root}.part{len(self.paths)}{ext}"
+        else:
+            path = self.path
+        self._writer = pq.ParquetWriter(path, schema)
+        self.paths.append(path)
+
+    def _conform(self, table):
+        """`table` cast to the open file's schema, or None if it cannot be."""
+        import pyarrow as pa
+
+        schema = self._writer.schema
+        if not set(table.column_names) <= set(schema.names):
+            return None
+        columns = []
+        for field in schema:
+            if field.name not in table.column_names:
+                columns.append(pa.nulls(len(table), field.type))
+                continue
+            column = table.column(field.name)
+            if column.type != field.type:
+                try:
+                    column = column.cast(field.type)
+                except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                    return None
+            columns.append(column)
+        return pa.Table.from_arrays(columns, schema=schema)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class DatabaseSink:
+    """
+    Appends batches to a table through pandas.to_sql.
+    """
+
+    def __init__(self, table_name, engine):
+        self.table_name = table_name
+        self.engine = engine
+
+    def write(self, df):
+        df.to_sql(self.table_name, self.engine, if_exists="append", index=False)
+
+    def close(self):
+        pass
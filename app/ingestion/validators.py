@@ -1,10 +1,8 @@
 ALLOWED_EXTENSIONS = {".csv", ".xlsx", ".json", ".zip"}
 MAX_FILE_SIZE = 500 * 1024 * 1024  # 500MB
+MAX_RESUMABLE_FILE_SIZE = 20 * 1024 * 1024 * 1024  # 20GB, chunked uploads only
 
-def validate_file(filename: str, size: int):
+def validate_extension(filename: str):
     ext = filename.lower().rsplit(".", 1)[-1]
     if f".{ext}" not in ALLOWED_EXTENSIONS:
         raise ValueError("Unsupported file type")
-
-    if size > MAX_FILE_SIZE:
-        raise ValueError("File too large")
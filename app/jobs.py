@@ -0,0 +1,114 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# =====================================================
+# BACKGROUND JOB QUEUE
+# =====================================================
+# Long analyses run on a local worker pool instead of inside the request.
+# Every job has a cache key; submitting a key that is already running
+# returns the running job, and a key that already finished returns its
+# result without running again. Keys must therefore name everything the
+# result depends on (case, data version, parameters).
+
+MAX_WORKERS = int(os.environ.get("CDR_JOB_WORKERS", "2"))
+RESULT_CACHE_SIZE = int(os.environ.get("CDR_JOB_CACHE_SIZE", "64"))
+JOB_HISTORY = 1000  # finished jobs kept for status lookups
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class Job:
+    def __init__(self, key):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+
+    def to_dict(self, include_result=True):
+        info = {
+            "job_id": self.id,
+            "status": self.status,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.status == FAILED:
+            info["error"] = self.error
+        if include_result and self.status == DONE:
+            info["result"] = self.result
+        return info
+
+
+class JobQueue:
+    def __init__(self, max_workers=MAX_WORKERS, cache_size=RESULT_CACHE_SIZE):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cdr-job")
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()    # job id -> Job, oldest first
+        self._by_key = OrderedDict()  # cache key -> Job, least recently used first
+        self.cache_size = cache_size
+
+    def submit(self, key, fn, *args, **kwargs):
+        """
+        Job for `key`: the cached or in-flight one if it exists, otherwise a
+        new job running fn(*args, **kwargs) on the pool.
+        """
+        with self._lock:
+            job = self._by_key.get(key)
+            if job is not None and job.status != FAILED:
+                self._by_key.move_to_end(key)
+                return job
+
+            job = Job(key)
+            self._jobs[job.id] = job
+            self._by_key[key] = job
+            self._evict()
+            job.future = self._executor.submit(self._run, job, fn, args, kwargs)
+            return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = fn(*args, **kwargs)
+            job.status = DONE
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = FAILED
+            with self._lock:
+                if self._by_key.get(job.key) is job:
+                    del self._by_key[job.key]
+            raise
+        finally:
+            job.finished_at = time.time()
+        return job.result
+
+    def _evict(self):
+        # Called with the lock held; running jobs are never dropped
+        while len(self._by_key) > self.cache_size:
+            key, job = next(iter(self._by_key.items()))
+            if job.status in (QUEUED, RUNNING):
+                break
+            del self._by_key[key]
+        while len(self._jobs) > JOB_HISTORY:
+            job_id, job = next(iter(self._jobs.items()))
+            if job.status in (QUEUED, RUNNING):
+                break
+            del self._jobs[job_id]
+            if self._by_key.get(job.key) is job:
+                del self._by_key[job.key]
+
+
+queue = JobQueue()
@@ -3,3 +3,4 @@ from .user import User
 from .cdr import CDR, AnalysisLog
 from .user import User
 from .otp import OTP
+from .aggregates import AnalyticsWatermark, CallerCount, CallerHourCount, ImsiImei, ImeiSubscriber
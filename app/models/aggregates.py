@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from app.database import Base
+from datetime import datetime
+
+# Materialized aggregates maintained by app.incremental_analytics.
+# Each table is folded forward from CDR rows above the stored watermark
+# (the highest CDR id folded; ids commit in order, see CDRBulkLoader).
+
+class AnalyticsWatermark(Base):
+    __tablename__ = "analytics_watermark"
+    name = Column(String, primary_key=True)
+    last_cdr_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class CallerCount(Base):
+    __tablename__ = "agg_caller_count"
+    caller = Column(String, primary_key=True)
+    call_count = Column(Integer, nullable=False, default=0, index=True)
+
+class CallerHourCount(Base):
+    __tablename__ = "agg_caller_hour_count"
+    caller = Column(String, primary_key=True)
+    hour = Column(DateTime, primary_key=True)
+    call_count = Column(Integer, nullable=False, default=0, index=True)
+
+class ImsiImei(Base):
+    __tablename__ = "agg_imsi_imei"
+    imsi = Column(String, primary_key=True)
+    imei = Column(String, primary_key=True)
+
+class ImeiSubscriber(Base):
+    __tablename__ = "agg_imei_subscriber"
+    imei = Column(String, primary_key=True)
+    subscriber_id = Column(String, primary_key=True)
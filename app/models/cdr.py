@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index, ForeignKey
 from app.database import Base
 from datetime import datetime
 
@@ -8,17 +8,29 @@ class CDR(Base):
     caller = Column(String, index=True)
     callee = Column(String, index=True)
     timestamp = Column(DateTime)
-    duration = Column(Integer)  # seconds
+    duration = Column(Integer, index=True)  # seconds
     imei = Column(String)
     imsi = Column(String)
     call_type = Column(String)
     cell_tower = Column(String)
     subscriber_id = Column(String, index=True)
+    case_id = Column(String)  # Upload.case_id of the evidence the row came from
+    upload_id = Column(Integer, ForeignKey("uploads.id"), index=True)
+
+    __table_args__ = (
+        # Case-scoped analytics filter on case first, then a time range
+        Index("ix_cdr_case_timestamp", "case_id", "timestamp"),
+    )
 
 class AnalysisLog(Base):
     __tablename__ = "analysis_log"
     id = Column(Integer, primary_key=True, index=True)
-    subscriber_id = Column(String)
+    subscriber_id = Column(String, index=True)
     anomaly_type = Column(String)
     details = Column(JSON)
-    timestamp = Column(DateTime, default=datetime.utcnow)
+    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
+    content_hash = Column(String(64), unique=True)  # sha256 of (anomaly_type, subject, window)
+
+    __table_args__ = (
+        Index("ix_analysis_log_type_timestamp", "anomaly_type", "timestamp"),
+    )
@@ -8,6 +8,7 @@ class Upload(Base):
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String, nullable=False)
     stored_path = Column(String, nullable=False)
+    blob_ref = Column(String)  # reference held on the blob store entry; release it when the record goes
     sha256 = Column(String, nullable=False, unique=True)
     uploader = Column(String, nullable=False)
     case_id = Column(String, nullable=False)
@@ -1,16 +1,107 @@
-from fastapi import APIRouter, Depends
+import asyncio
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from app.database import get_db
-from app.analytics import analyze_cdr
+from app.analytics import analyze_cdr_job, data_version, ANALYSIS_MODES
+from app.jobs import queue
+from app.anomaly_store import query_anomalies
+from cdrintel.analytics.intelligence_engine import analyze_case
+from cdrintel.storage.case_store import CaseStore
 from app.security import get_current_user
 from app.models.user import User
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
+case_store = CaseStore()
+
+def submit_analysis(db: Session, mode: str, case_id=None, start=None, end=None):
+    if mode not in ANALYSIS_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(ANALYSIS_MODES)}")
+    # Same case, data and parameters -> same job, so repeats hit the cached result
+    key = ("analyze_cdr", case_id, data_version(db), mode, start, end)
+    return queue.submit(key, analyze_cdr_job, mode, case_id, start, end)
+
 @router.get("/generate")
-def generate_intelligence(
+async def generate_intelligence(
+    mode: str = "incremental",
+    case_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    intel = analyze_cdr(db)
+    # Runs on the job pool; awaiting it keeps request workers free
+    job = await run_in_threadpool(submit_analysis, db, mode, case_id, start, end)
+    try:
+        intel = await asyncio.wrap_future(job.future)
+    except Exception:
+        raise HTTPException(status_code=500, detail=job.error)
     return {"message": "Intelligence generated", "data": intel}
+
+@router.post("/jobs", status_code=202)
+def submit_intelligence_job(
+    mode: str = "incremental",
+    case_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    job = submit_analysis(db, mode, case_id, start, end)
+    return job.to_dict(include_result=False)
+
+@router.get("/jobs/{job_id}")
+def intelligence_job_status(job_id: str, current_user: User = Depends(get_current_user)):
+    job = queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@router.get("/anomalies")
+def list_anomalies(
+    subscriber_id: Optional[str] = None,
+    anomaly_type: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(100, le=1000),
+    offset: int = 0,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    logs = query_anomalies(db, subscriber_id, anomaly_type, since, until, limit, offset)
+    return {
+        "data": [
+            {
+                "id": log.id,
+                "subscriber_id": log.subscriber_id,
+                "anomaly_type": log.anomaly_type,
+                "details": log.details,
+                "timestamp": log.timestamp,
+            }
+            for log in logs
+        ]
+    }
+
+@router.get("/cases/{case_id}/summary")
+def case_summary(
+    case_id: str,
+    caller: Optional[str] = None,
+    receiver: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user)
+):
+    if case_id not in case_store.cases():
+        raise HTTPException(status_code=404, detail="Case not found")
+    intel = analyze_case(
+        case_store, case_id,
+        callers=[caller] if caller else None,
+        receivers=[receiver] if receiver else None,
+        start=start, end=end,
+    )
+    for key in ("top_communicators", "daily_activity", "peak_hours"):
+        intel[key] = intel[key].to_dict(orient="records")
+    return {"case_id": case_id, "data": intel}
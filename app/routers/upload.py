@@ -1,59 +1,216 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Header, Request
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from app.database import SessionLocal
+from starlette.concurrency import run_in_threadpool
+from app.database import get_db
 from app.models import Upload
-from app.ingestion.validators import validate_file
+from app.models.user import User
+from app.ingestion.validators import validate_extension, MAX_FILE_SIZE, MAX_RESUMABLE_FILE_SIZE
 from app.security import get_current_user
-from datetime import datetime
+from cdrintel.storage.blob_store import BlobStore, BlobTooLarge, iter_upload
+from cdrintel.storage.chunked_upload import (
+    ChunkedUploadStore, UploadSessionNotFound, ChunkRejected, ChecksumMismatch, IncompleteUpload, is_sha256
+)
 import os, uuid
 
 router = APIRouter(prefix="/upload", tags=["Secure Upload"])
 
-RAW_DIR = "app/storage/raw"
+BLOB_DIR = "app/storage/blobs"
+SESSION_DIR = "app/storage/sessions"
+
+# Evidence is content-addressed: one read-only blob per SHA-256
+blobs = BlobStore(BLOB_DIR)
+sessions = ChunkedUploadStore(SESSION_DIR)
+
+def is_known(db: Session, sha256: str):
+    return db.query(Upload.id).filter(Upload.sha256 == sha256.lower()).first() is not None
+
+def register_upload(db: Session, record: Upload):
+    """
+    Commit `record` unless evidence with the same hash exists. Returns False
+    for duplicates, including one committed concurrently.
+    """
+    if db.query(Upload.id).filter(Upload.sha256 == record.sha256).first():
+        return False
+    db.add(record)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return False
+    return True
 
 @router.post("/")
-def upload_file(
+async def upload_file(
     case_id: str,
     purpose: str,
     file: UploadFile = File(...),
-    user=Depends(get_current_user)
+    sha256: str = None,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
 ):
-    db: Session = SessionLocal()
+    try:
+        validate_extension(file.filename)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if file.size is not None and file.size > MAX_FILE_SIZE:
+        raise HTTPException(status_code=413, detail="File too large")
+    if sha256 and not is_sha256(sha256):
+        raise HTTPException(status_code=400, detail="sha256 must be a 64-character hex digest")
 
-    temp_name = f"{uuid.uuid4()}_{file.filename}"
-    temp_path = os.path.join(RAW_DIR, temp_name)
-
-    # Save temporarily
-    with open(temp_path, "wb") as f:
-        content = file.file.read()
-        validate_file(file.filename, len(content))
-        f.write(content)
+    # A declared hash lets known evidence be refused before the body is read
+    if sha256 and await run_in_threadpool(is_known, db, sha256):
+        raise HTTPException(status_code=409, detail="Duplicate evidence")
 
-    from app.ingestion.hashing import sha256_file
-    sha256 = sha256_file(temp_path)
+    # One pass over the body: stream into the blob store and hash in fixed-size chunks
+    ref = f"upload:{uuid.uuid4().hex}"
+    try:
+        sha256, size, _ = await blobs.write_stream(iter_upload(file), ref, sha256, MAX_FILE_SIZE)
+    except BlobTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ChecksumMismatch as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
-    # Prevent duplicate evidence
-    if db.query(Upload).filter(Upload.sha256 == sha256).first():
-        os.remove(temp_path)
-        raise HTTPException(status_code=409, detail="Duplicate evidence")
+    filename = os.path.basename(file.filename)
+    return await store_evidence(db, user, ref, filename, sha256, size, case_id, purpose)
 
+async def store_evidence(db, user, ref, filename, sha256, size, case_id, purpose):
+    """
+    Register a blob held under `ref` as evidence; the record keeps `ref` so
+    the blob can be released with it. The reference is released again
+    (deleting a blob nothing else uses) if the content is a duplicate.
+    """
     record = Upload(
-        filename=file.filename,
-        stored_path=temp_path,
+        filename=filename,
+        stored_path=str(blobs.path(sha256)),
+        blob_ref=ref,
         sha256=sha256,
-        uploader=user["username"],
+        uploader=user.username,
         case_id=case_id,
         purpose=purpose
     )
 
-    db.add(record)
-    db.commit()
-
-    # Make RAW file READ-ONLY
-    os.chmod(temp_path, 0o444)
+    # Prevent duplicate evidence
+    if not await run_in_threadpool(register_upload, db, record):
+        await run_in_threadpool(blobs.release, sha256, ref)
+        raise HTTPException(status_code=409, detail="Duplicate evidence")
 
     return {
         "message": "File uploaded securely",
         "sha256": sha256,
+        "size": size,
         "case_id": case_id
     }
+
+# ==========================
+# RESUMABLE CHUNKED UPLOADS
+# ==========================
+# POST /sessions                  -> open a session, get upload_id and chunk layout
+# PUT  /sessions/{id}/chunks/{n}  -> raw chunk body, optional X-Chunk-SHA256
+# GET  /sessions/{id}             -> received / missing chunks and their SHA-256, to resume
+# POST /sessions/{id}/complete    -> assemble, hash and register like POST /
+# DELETE /sessions/{id}           -> abort, dropping every received chunk
+def get_session(upload_id: str, user: User):
+    try:
+        manifest = sessions.manifest(upload_id)
+    except UploadSessionNotFound:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    if manifest["metadata"]["uploader"] != user.username:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return manifest
+
+@router.post("/sessions")
+def create_session(
+    case_id: str,
+    purpose: str,
+    filename: str,
+    total_size: int,
+    chunk_size: int = None,
+    sha256: str = None,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
+):
+    try:
+        validate_extension(filename)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if total_size > MAX_RESUMABLE_FILE_SIZE:
+        raise HTTPException(status_code=413, detail="File too large")
+    if sha256 and not is_sha256(sha256):
+        raise HTTPException(status_code=400, detail="sha256 must be a 64-character hex digest")
+
+    # A declared hash lets known evidence be refused before any byte is sent
+    if sha256 and is_known(db, sha256):
+        raise HTTPException(status_code=409, detail="Duplicate evidence")
+
+    try:
+        manifest = sessions.create(
+            os.path.basename(filename), total_size, chunk_size, sha256,
+            case_id=case_id, purpose=purpose, uploader=user.username
+        )
+    except ChunkRejected as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "upload_id": manifest["upload_id"],
+        "chunk_size": manifest["chunk_size"],
+        "total_chunks": manifest["total_chunks"]
+    }
+
+@router.get("/sessions/{upload_id}")
+def session_status(upload_id: str, user: User = Depends(get_current_user)):
+    get_session(upload_id, user)
+    return sessions.status(upload_id)
+
+@router.put("/sessions/{upload_id}/chunks/{index}")
+async def put_chunk(
+    upload_id: str,
+    index: int,
+    request: Request,
+    x_chunk_sha256: str = Header(None),
+    user: User = Depends(get_current_user)
+):
+    get_session(upload_id, user)
+    try:
+        return await sessions.receive_chunk(upload_id, index, request.stream(), x_chunk_sha256)
+    except ChecksumMismatch as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except ChunkRejected as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UploadSessionNotFound:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+
+@router.post("/sessions/{upload_id}/complete")
+async def complete_session(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
+):
+    manifest = get_session(upload_id, user)
+    partial_path = blobs.temp_path()
+    try:
+        sha256, size = await run_in_threadpool(sessions.assemble, upload_id, partial_path)
+    except IncompleteUpload as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ChecksumMismatch as e:
+        # The chunks are kept: the client compares their digests and re-sends
+        # the wrong ones, or aborts the session
+        raise HTTPException(status_code=422, detail={
+            "message": str(e), "unverified_chunks": sessions.unverified_chunks(upload_id)
+        })
+    sessions.discard(upload_id)
+
+    # Moved into the store unless the same bytes are already there
+    ref = f"upload:{uuid.uuid4().hex}"
+    await run_in_threadpool(blobs.adopt, partial_path, sha256, ref)
+
+    metadata = manifest["metadata"]
+    return await store_evidence(
+        db, user, ref, manifest["filename"], sha256, size, metadata["case_id"], metadata["purpose"]
+    )
+
+@router.delete("/sessions/{upload_id}")
+def abort_session(upload_id: str, user: User = Depends(get_current_user)):
+    get_session(upload_id, user)
+    sessions.discard(upload_id)
+    return {"message": "Upload session aborted", "upload_id": upload_id}
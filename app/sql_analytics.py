@@ -0,0 +1,104 @@
+from datetime import datetime
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+from app.models import CDR
+
+# SQL execution mode for the app.analytics detectors. Every aggregate runs in
+# the database through SQLAlchemy Core, so only result rows are transferred.
+# NULL keys are filtered out to mirror pandas groupby/value_counts semantics.
+#
+# Every query takes a `scope`: extra WHERE clauses from cdr_scope() that
+# restrict it to one case and/or time range via the (case_id, timestamp) index.
+
+
+def cdr_scope(case_id=None, start=None, end=None):
+    """WHERE clauses selecting one case's rows in [start, end)."""
+    scope = []
+    if case_id is not None:
+        scope.append(CDR.case_id == case_id)
+    if start is not None:
+        scope.append(CDR.timestamp >= start)
+    if end is not None:
+        scope.append(CDR.timestamp < end)
+    return scope
+
+
+def _hour_bucket(dialect):
+    if dialect == "postgresql":
+        return func.date_trunc('hour', CDR.timestamp)
+    if dialect == "sqlite":
+        return func.strftime('%Y-%m-%d %H:00:00', CDR.timestamp)
+    raise NotImplementedError(f"SQL analytics does not support {dialect}")
+
+
+def _as_datetime(value):
+    # SQLite returns the strftime bucket as text
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def top_callers(db: Session, top_n=10, scope=()):
+    call_count = func.count().label('call_count')
+    rows = db.execute(
+        select(CDR.caller, call_count)
+        .where(CDR.caller.is_not(None), *scope)
+        .group_by(CDR.caller)
+        .order_by(call_count.desc(), CDR.caller)
+        .limit(top_n)
+    ).all()
+    return {caller: count for caller, count in rows}
+
+
+def long_calls(db: Session, threshold, scope=()):
+    rows = db.execute(
+        select(CDR.caller, CDR.callee, CDR.duration, CDR.timestamp, CDR.imei, CDR.imsi, CDR.subscriber_id)
+        .where(CDR.duration >= threshold, *scope)
+        .order_by(CDR.id)
+    ).mappings().all()
+    return [dict(r) for r in rows]
+
+
+def burst_calls(db: Session, threshold, scope=()):
+    hour = _hour_bucket(db.get_bind().dialect.name).label('hour')
+    call_count = func.count().label('call_count')
+    rows = db.execute(
+        select(CDR.caller, hour, call_count)
+        .where(CDR.caller.is_not(None), CDR.timestamp.is_not(None), *scope)
+        .group_by(CDR.caller, hour)
+        .having(func.count() >= threshold)
+        .order_by(CDR.caller, hour)
+    ).all()
+    return [{'caller': caller, 'hour': _as_datetime(h), 'call_count': count} for caller, h, count in rows]
+
+
+def sim_swaps(db: Session, scope=()):
+    distinct_imei = func.count(CDR.imei.distinct())
+    rows = db.execute(
+        select(CDR.imsi, distinct_imei.label('imei'))
+        .where(CDR.imsi.is_not(None), *scope)
+        .group_by(CDR.imsi)
+        .having(distinct_imei > 1)
+        .order_by(CDR.imsi)
+    ).mappings().all()
+    return [dict(r) for r in rows]
+
+
+def burner_phones(db: Session, scope=()):
+    distinct_subscribers = func.count(CDR.subscriber_id.distinct())
+    rows = db.execute(
+        select(CDR.imei, distinct_subscribers.label('subscriber_id'))
+        .where(CDR.imei.is_not(None), *scope)
+        .group_by(CDR.imei)
+        .having(distinct_subscribers > 1)
+        .order_by(CDR.imei)
+    ).mappings().all()
+    return [dict(r) for r in rows]
+
+
+def analyze_cdr_sql(db: Session, long_call_threshold, burst_call_threshold, top_n=10, scope=()):
+    return {
+        'top_callers': top_callers(db, top_n, scope),
+        'long_calls': long_calls(db, long_call_threshold, scope),
+        'burst_calls': burst_calls(db, burst_call_threshold, scope),
+        'sim_swaps': sim_swaps(db, scope),
+        'burner_phones': burner_phones(db, scope),
+    }
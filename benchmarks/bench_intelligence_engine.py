@@ -0,0 +1,43 @@
+"""
+intelligence_engine.analyze_cdr: legacy three-groupby implementation vs the
+fused aggregation kernel, timed on a synthetic table. The edge-case
+regression checks live in tests/test_intelligence_engine.py.
+
+    python benchmarks/bench_intelligence_engine.py --rows 10000000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cdrintel.analytics.intelligence_engine import analyze_cdr  # noqa: E402
+from tests.test_intelligence_engine import assert_same, legacy_analyze_cdr, synthetic_cdr  # noqa: E402
+
+
+def timed(label, rows, fn):
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<24} {elapsed:8.3f}s  {rows / elapsed:14,.0f} rows/s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--callers', type=int, default=50_000)
+    parser.add_argument('--days', type=int, default=90)
+    args = parser.parse_args()
+
+    df = synthetic_cdr(args.rows, args.callers, args.days)
+    print(f"{args.rows:,} rows, {args.callers:,} callers over {args.days} days")
+    legacy = timed("legacy groupbys", args.rows, lambda: legacy_analyze_cdr(df))
+    fused = timed("fused kernel", args.rows, lambda: analyze_cdr(df))
+    assert_same(legacy, fused, "benchmark", df)
+    print("results match")
+
+
+if __name__ == "__main__":
+    main()
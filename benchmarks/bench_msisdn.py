@@ -0,0 +1,97 @@
+"""
+MSISDN canonicalization throughput on the bundled dataset: legacy digit
+stripping, a per-row canonicalizer and cdrintel.ingestion.msisdn.
+
+    python benchmarks/bench_msisdn.py --repeat 20
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from cdrintel.ingestion import msisdn  # noqa: E402
+from cdrintel.ingestion.csv_reader import read_cdr_csv  # noqa: E402
+
+DATASET = os.path.join(ROOT_DIR, "cdr_files", "realtime_cdr_fraud_dataset.csv")
+
+
+def mixed_formats(numbers, seed=42):
+    """Rewrite numbers as Kenyan mobiles in the formats seen across exports."""
+    rng = np.random.default_rng(seed)
+    subscriber = "7" + numbers.str[-8:]
+    formats = [
+        "0" + subscriber,
+        subscriber,
+        "254" + subscriber,
+        "+254 " + subscriber.str[:3] + " " + subscriber.str[3:6] + " " + subscriber.str[6:],
+        "00254" + subscriber,
+    ]
+    choice = rng.integers(0, len(formats), len(numbers))
+    return pd.Series(np.choose(choice, [f.to_numpy(dtype=object) for f in formats]), index=numbers.index)
+
+
+def row_canonicalize(number, country=msisdn.DEFAULT_COUNTRY):
+    if number is None or pd.isna(number):
+        return None
+    text = str(number).strip()
+    digits = re.sub(r"\D", "", text)
+    if not digits:
+        return None
+    if text.startswith("+"):
+        return "+" + digits
+    if digits.startswith("00"):
+        return "+" + digits[2:]
+    national = msisdn.NATIONAL_NUMBER_LENGTH[country]
+    if digits.startswith(country) and len(digits) == len(country) + national:
+        return "+" + digits
+    if digits.startswith("0") and len(digits) == national + 1:
+        return "+" + country + digits[1:]
+    if not digits.startswith("0") and len(digits) == national:
+        return "+" + country + digits
+    return digits
+
+
+def timed(label, rows, repeat, fn):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    elapsed = (time.perf_counter() - started) / repeat
+    print(f"{label:<34} {elapsed * 1000:9.2f} ms  {rows / elapsed:14,.0f} rows/s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--scale", type=int, default=1, help="concatenate the dataset this many times")
+    args = parser.parse_args()
+
+    df = read_cdr_csv(DATASET)
+    numbers = pd.concat([df["caller_id"], df["receiver_id"]] * args.scale, ignore_index=True)
+    mixed = mixed_formats(numbers)
+
+    for label, column in (("dataset numbers", numbers), ("mixed Kenyan formats", mixed)):
+        print(f"\n{label}: {len(column):,} rows, {column.nunique():,} distinct")
+        timed("legacy digit strip", len(column), args.repeat,
+              lambda: column.astype(str).str.replace(r"\D", "", regex=True))
+        expected = timed("per-row canonicalize", len(column), 1,
+                         lambda: column.map(row_canonicalize))
+
+        result = timed("vectorized canonicalize", len(column), args.repeat,
+                       lambda: msisdn.canonicalize_msisdn(column))
+
+        assert result.astype(object).where(result.notna(), None).tolist() == expected.tolist(), \
+            "vectorized canonicalization disagrees with the per-row reference"
+
+    print("\nresults match")
+
+
+if __name__ == "__main__":
+    main()
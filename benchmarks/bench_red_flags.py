@@ -0,0 +1,91 @@
+"""
+advanced_analytics.red_flag_scores: the original per-caller groupby loop vs
+the vectorized scorer. The loop's score (long calls + night calls) is checked
+against the matching signals on a sample, then the vectorized scorer is timed
+on a table with a million distinct callers.
+
+    python benchmarks/bench_red_flags.py --rows 5000000 --callers 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from advanced_analytics import red_flag_scores  # noqa: E402
+
+
+def synthetic_cdr(rows, callers, seed=42):
+    rng = np.random.default_rng(seed)
+    start = np.datetime64('2025-01-01T00:00:00')
+    caller = rng.integers(0, callers, rows)
+    # A few numbers outside +254, so the international ratio is not all zero
+    foreign = rng.random(rows) < 0.05
+    callee = np.where(foreign, "+44" + (rng.integers(0, 10**9, rows)).astype(str),
+                      "+2547" + (rng.integers(0, callers, rows) % 10**8).astype(str))
+    return pd.DataFrame({
+        'caller': pd.Categorical.from_codes(caller, [f"+2547{i:08d}" for i in range(callers)]),
+        'callee': callee,
+        'duration': rng.gamma(2.0, 60.0, rows).round(),
+        'timestamp': start + rng.integers(0, 30 * 86400, rows).astype('timedelta64[s]'),
+    })
+
+
+def legacy_red_flag_scores(df):
+    """The original loop, on a `start_time` column."""
+    scores = {}
+    for caller, g in df.groupby('caller', observed=True):
+        score = 0
+        score += g[g['duration'] > g['duration'].mean() * 2].shape[0]
+        score += g[g['start_time'].dt.hour.between(0, 5)].shape[0]
+        scores[caller] = score
+    return scores
+
+
+def check(df):
+    sample = df.rename(columns={'timestamp': 'start_time'})
+    legacy = legacy_red_flag_scores(sample)
+    scored = red_flag_scores(sample).set_index('caller')
+    assert len(scored) == len(legacy), "caller count"
+    combined = (scored['long_calls'] + scored['night_calls']).to_dict()
+    assert combined == legacy, "long + night calls disagree with the legacy score"
+
+    ranked = red_flag_scores(df)
+    assert ranked['score'].is_monotonic_decreasing, "not ranked"
+    only_legacy = red_flag_scores(df, weights={'international_ratio': 0, 'burst_hours': 0,
+                                               'distinct_counterparts': 0})
+    assert (only_legacy['score'] == only_legacy['long_calls'] + only_legacy['night_calls']).all()
+    print(f"ok  {len(legacy):,} callers match the legacy score")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=5_000_000)
+    parser.add_argument('--callers', type=int, default=1_000_000)
+    parser.add_argument('--legacy-callers', type=int, default=5_000)
+    args = parser.parse_args()
+
+    sample = synthetic_cdr(args.legacy_callers * 5, args.legacy_callers, seed=7)
+    check(sample)
+
+    started = time.perf_counter()
+    legacy_red_flag_scores(sample.rename(columns={'timestamp': 'start_time'}))
+    legacy_elapsed = time.perf_counter() - started
+    print(f"legacy loop   {args.legacy_callers:>10,} callers {legacy_elapsed:8.3f}s "
+          f"({args.legacy_callers / legacy_elapsed:,.0f} callers/s)")
+
+    df = synthetic_cdr(args.rows, args.callers)
+    started = time.perf_counter()
+    scores = red_flag_scores(df)
+    elapsed = time.perf_counter() - started
+    print(f"vectorized    {args.callers:>10,} callers {elapsed:8.3f}s "
+          f"({len(scores) / elapsed:,.0f} callers/s, {args.rows / elapsed:,.0f} rows/s)")
+    print(scores.head(5).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
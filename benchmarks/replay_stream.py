@@ -0,0 +1,146 @@
+"""
+Replay the bundled realtime fraud dataset through the streaming detector and
+report throughput, per-record latency and how alerts line up with the
+dataset's transaction_status labels.
+
+    python benchmarks/replay_stream.py                    # as fast as possible
+    python benchmarks/replay_stream.py --speed 1          # at recorded pace
+    python benchmarks/replay_stream.py --transport socket # via the TCP source
+    python benchmarks/replay_stream.py --transport tail   # via the file tailer
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from cdrintel.analytics.stream_detector import StreamDetector  # noqa: E402
+from cdrintel.ingestion.live_sources import replay_csv, socket_source, tail_csv  # noqa: E402
+
+DATASET = os.path.join(ROOT_DIR, "cdr_files", "realtime_cdr_fraud_dataset.csv")
+
+
+async def via_socket(args):
+    """Send the replay to a local socket_source and read it back out."""
+    ready = asyncio.Event()
+    source = socket_source(port=args.port, ready=ready)
+    first = asyncio.ensure_future(source.__anext__())
+    await ready.wait()
+
+    async def send():
+        _, writer = await asyncio.open_connection("127.0.0.1", args.port)
+        async for record in replay_csv(DATASET, speed=args.speed, limit=args.limit):
+            record["_sent_at"] = time.perf_counter()
+            writer.write(json.dumps(record).encode() + b"\n")
+            await writer.drain()
+        writer.close()
+
+    sender = asyncio.ensure_future(send())
+    expected = args.limit or sum(1 for _ in open(DATASET)) - 1
+    yield await first
+    for _ in range(expected - 1):
+        yield await source.__anext__()
+    await sender
+    await source.aclose()
+
+
+async def via_tail(args):
+    """Append the replay to a file while tail_csv follows it."""
+    workdir = tempfile.mkdtemp()
+    path = os.path.join(workdir, "live.csv")
+
+    async def write():
+        with open(path, "w", newline="") as out:
+            rows = csv.writer(out, lineterminator="\n")
+            with open(DATASET) as f:
+                out.write(f.readline())
+            async for record in replay_csv(DATASET, speed=args.speed, limit=args.limit):
+                rows.writerow(record.values())
+                out.flush()
+
+    writer = asyncio.ensure_future(write())
+    try:
+        async for record in tail_csv(path, poll_interval=0.01, idle_timeout=0.5):
+            yield record
+    finally:
+        await writer
+        shutil.rmtree(workdir)
+
+
+async def replay(args):
+    detector = StreamDetector(
+        window_seconds=args.window, burst_threshold=args.burst,
+        churn_threshold=args.churn, fanout_threshold=args.fanout, max_keys=args.max_keys,
+    )
+    if args.transport == "socket":
+        source = via_socket(args)
+    elif args.transport == "tail":
+        source = via_tail(args)
+    else:
+        source = replay_csv(DATASET, speed=args.speed, limit=args.limit)
+
+    latencies, transit = [], []
+    alerts_by_type = Counter()
+    flagged = {}  # alert type -> transaction_status of the records that raised it
+    labels = Counter()
+
+    started = time.perf_counter()
+    async for record in source:
+        received = time.perf_counter()
+        sent_at = record.pop("_sent_at", None)
+        if sent_at is not None:
+            transit.append(received - sent_at)
+        labels[record.get("transaction_status")] += 1
+        for alert in detector.process(record):
+            alerts_by_type[alert["type"]] += 1
+            flagged.setdefault(alert["type"], Counter())[record.get("transaction_status")] += 1
+        latencies.append(time.perf_counter() - received)
+    elapsed = time.perf_counter() - started
+
+    stats = detector.stats()
+    print(f"transport {args.transport}, speed {args.speed or 'max'}")
+    print(f"{stats['records']:,} records in {elapsed:.3f}s  ({stats['records'] / elapsed:,.0f} records/s)")
+    lat = np.array(latencies) * 1e6
+    print(f"detector latency per record: p50 {np.percentile(lat, 50):.1f}us  "
+          f"p99 {np.percentile(lat, 99):.1f}us  max {lat.max():.1f}us")
+    if transit:
+        t = np.array(transit) * 1e3
+        print(f"socket transit: p50 {np.percentile(t, 50):.2f}ms  p99 {np.percentile(t, 99):.2f}ms")
+
+    base_rate = labels["Fraudulent"] / max(sum(labels.values()), 1)
+    print(f"\nfraudulent records in stream: {base_rate:.1%}")
+    print(f"{'alert':<22}{'count':>8}{'fraudulent':>12}")
+    for alert_type, count in alerts_by_type.most_common():
+        share = flagged[alert_type]["Fraudulent"] / count
+        print(f"{alert_type:<22}{count:>8}{share:>12.1%}")
+    print(f"\nkeys held: {stats['keys']}")
+    print(f"evicted:   {stats['evicted']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transport", choices=("direct", "socket", "tail"), default="direct")
+    parser.add_argument("--speed", type=float, default=None, help="replay speed factor; omit for max")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--window", type=int, default=3600)
+    parser.add_argument("--burst", type=int, default=20)
+    parser.add_argument("--churn", type=int, default=3)
+    parser.add_argument("--fanout", type=int, default=5)
+    parser.add_argument("--max-keys", type=int, default=100_000)
+    parser.add_argument("--port", type=int, default=9009)
+    args = parser.parse_args()
+    asyncio.run(replay(args))
+
+
+if __name__ == "__main__":
+    main()
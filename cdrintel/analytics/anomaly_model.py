@@ -0,0 +1,132 @@
+import glob
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+
+
+# =====================================================
+# ANOMALY SCORING SERVICE
+# =====================================================
+# An IsolationForest is trained on a vectorized feature matrix and persisted
+# to one file per feature set, together with the fingerprint of the dataset
+# it was trained on. New uploads are scored with the fitted model instead of
+# refitting, and restarts reload it however much data arrived since; call
+# fit() to retrain. Fitting replaces (and prunes) every older model file.
+#
+# Features per call:
+#   duration       call duration in seconds
+#   hour           hour of day
+#   night          1 for calls between 00:00 and 05:59
+#   international  1 for international calls
+#   fan_out        distinct receivers contacted by the caller
+
+FEATURES = ["duration", "hour", "night", "international", "fan_out"]
+# Columns build_features reads; callers can materialize just these
+INPUT_COLUMNS = [
+    "duration", "timestamp", "is_night_call", "call_type",
+    "country_origin", "country_dest", "caller", "receiver",
+]
+FEATURE_SET_VERSION = 1
+DEFAULT_MODEL_DIR = os.environ.get("CDR_MODEL_DIR", "anomaly_models")
+
+
+def build_features(df: pd.DataFrame, context: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Feature matrix for `df`. Caller fan-out is counted over `context`
+    (defaults to `df`), so rows of a new upload see the caller's full history.
+    """
+    index = df.index
+    features = pd.DataFrame(index=index)
+
+    if "duration" in df.columns:
+        features["duration"] = pd.to_numeric(df["duration"], errors="coerce").fillna(0)
+    else:
+        features["duration"] = 0.0
+
+    if "timestamp" in df.columns:
+        hour = pd.to_datetime(df["timestamp"], errors="coerce").dt.hour
+        features["hour"] = hour.fillna(12).astype(int)
+    else:
+        features["hour"] = 12
+
+    if "is_night_call" in df.columns:
+        features["night"] = pd.to_numeric(df["is_night_call"], errors="coerce").fillna(0).astype(int)
+    else:
+        features["night"] = features["hour"].between(0, 5).astype(int)
+
+    if "call_type" in df.columns:
+        features["international"] = (df["call_type"].astype(str).str.lower() == "international").astype(int)
+    elif "country_origin" in df.columns and "country_dest" in df.columns:
+        features["international"] = (df["country_origin"] != df["country_dest"]).astype(int)
+    else:
+        features["international"] = 0
+
+    if "caller" in df.columns and "receiver" in df.columns:
+        context = df if context is None else context
+        fan_out = context.groupby("caller")["receiver"].nunique()
+        features["fan_out"] = df["caller"].map(fan_out).fillna(0)
+    else:
+        features["fan_out"] = 0
+
+    return features[FEATURES].astype(float)
+
+
+class AnomalyScorer:
+    def __init__(self, model_dir=DEFAULT_MODEL_DIR, contamination=0.05, random_state=42):
+        self.model_dir = model_dir
+        self.contamination = contamination
+        self.random_state = random_state
+        self.model = None
+        self.version = None
+
+    def _model_path(self):
+        return os.path.join(self.model_dir, f"isoforest-v{FEATURE_SET_VERSION}.joblib")
+
+    def fit(self, df: pd.DataFrame, version: str):
+        """Train on `df` (fingerprint `version`) and persist the model."""
+        model = IsolationForest(contamination=self.contamination, random_state=self.random_state)
+        model.fit(build_features(df).to_numpy())
+        os.makedirs(self.model_dir, exist_ok=True)
+        path = self._model_path()
+        tmp_path = path + ".tmp"
+        joblib.dump({"model": model, "trained_on": version}, tmp_path)
+        os.replace(tmp_path, path)
+        self._prune(keep=path)
+        self.model, self.version = model, version
+        return self
+
+    def _prune(self, keep):
+        # Models of older feature sets, and ones keyed by dataset fingerprint
+        for path in glob.glob(os.path.join(self.model_dir, "isoforest-*.joblib")):
+            if path != keep:
+                os.remove(path)
+
+    def load(self) -> bool:
+        """Load the persisted model, if there is one for the current feature set."""
+        path = self._model_path()
+        if not os.path.exists(path):
+            return False
+        saved = joblib.load(path)
+        self.model, self.version = saved["model"], saved["trained_on"]
+        return True
+
+    def ensure(self, df: pd.DataFrame, version: str):
+        """
+        Make sure a model is available: the one in memory, else the persisted
+        one, else one trained on `df` (fingerprint `version`). `version` of
+        the model in use is the fingerprint it was trained on.
+        """
+        if self.model is None and not self.load():
+            self.fit(df, version)
+        return self
+
+    def score(self, df: pd.DataFrame, context: pd.DataFrame = None) -> np.ndarray:
+        """-1 for anomalous rows, 1 otherwise. Requires a fitted model."""
+        if df.empty:
+            return np.empty(0, dtype=int)
+        if self.model is None:
+            raise RuntimeError("AnomalyScorer has no fitted model; call ensure() first")
+        return self.model.predict(build_features(df, context).to_numpy())
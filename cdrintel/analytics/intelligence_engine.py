@@ -1,5 +1,8 @@
+import numpy as np
 import pandas as pd
 
+from cdrintel.storage.compact_frame import CompactCDRFrame
+
 
 # =====================================================
 # REQUIRED COLUMN NAMES IN YOUR CDR DATA
@@ -10,12 +13,137 @@ import pandas as pd
 # timestamp   -> full datetime of call
 
 # You can rename columns before passing dataframe if needed.
+# A CompactCDRFrame is accepted as well; its caller/receiver columns
+# stand in for msisdn/other_party.
+
+ENGINE_COLUMNS = ["msisdn", "other_party", "duration", "timestamp"]
+
+
+# =====================================================
+# FUSED AGGREGATION KERNEL
+# =====================================================
+# Every aggregate analyze_cdr reports comes from one factorization of the
+# caller column and one ordered pass over int64 timestamps:
+#
+#   per caller  -> bincount over caller codes (calls, duration sum/count)
+#   per day     -> run boundaries of the sorted day numbers
+#   per hour    -> bincount over hour of day
+#
+# The input frame is read, never copied or modified. Sorting is skipped when
+# timestamps already arrive in order, as exported CDRs usually do.
+
+def _timestamp_values(values: pd.Series) -> np.ndarray:
+    stamps = values
+    if not pd.api.types.is_datetime64_any_dtype(stamps.dtype):
+        stamps = pd.to_datetime(stamps, errors="coerce")
+    if stamps.dt.tz is not None:
+        # Same wall-clock dates and hours as .dt.date / .dt.hour
+        stamps = stamps.dt.tz_localize(None)
+    return stamps.to_numpy()
+
+
+def _caller_aggregates(msisdn, duration, has_duration, top_n):
+    if isinstance(msisdn.dtype, pd.CategoricalDtype):
+        # Already dictionary-encoded (e.g. from a CompactCDRFrame)
+        codes = msisdn.cat.codes.to_numpy()
+        callers = pd.Categorical.from_codes(np.arange(len(msisdn.cat.categories)), dtype=msisdn.dtype)
+    else:
+        codes, callers = pd.factorize(msisdn, sort=True)
+    known = codes >= 0
+    keys = codes[known]
+    calls = np.bincount(keys, minlength=len(callers))
+    sums = np.bincount(keys, weights=duration[known], minlength=len(callers))
+    counted = np.bincount(codes[known & has_duration], minlength=len(callers))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counted
+
+    # Ties keep caller order, like a stable sort of the grouped result;
+    # categories nobody called from are skipped
+    observed = np.flatnonzero(calls)
+    order = observed[np.argsort(-calls[observed], kind="stable")[:top_n]]
+    return pd.DataFrame({
+        "msisdn": callers[order],
+        "total_calls": calls[order],
+        "total_duration": sums[order],
+        "avg_duration": means[order],
+    })
+
+
+def _time_aggregates(stamps, named):
+    valid = ~np.isnat(stamps)
+    stamps, named = stamps[valid], named[valid]
+    if len(stamps) > 1 and (stamps[1:] < stamps[:-1]).any():
+        order = np.argsort(stamps, kind="stable")
+        stamps, named = stamps[order], named[order]
+
+    days = stamps.astype("datetime64[D]")
+    if len(stamps):
+        starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+        ends = np.r_[starts[1:], len(stamps)] - 1
+        named_per_day = np.add.reduceat(named.astype(np.int64), starts)
+    else:
+        starts = ends = named_per_day = np.empty(0, dtype=np.int64)
+    daily_activity = pd.DataFrame({
+        "date": days[starts].astype(object),  # datetime.date, as .dt.date gives
+        "first_call": stamps[starts],
+        "last_call": stamps[ends],
+        "total_calls": named_per_day,
+    })
+
+    hours = stamps.astype("datetime64[h]").astype(np.int64) % 24
+    per_hour = np.bincount(hours, minlength=24)
+    present = np.flatnonzero(per_hour)
+    peak_hours = pd.DataFrame({
+        "hour": present.astype(np.int32),
+        "call_count": per_hour[present],
+    }).sort_values("call_count", ascending=False, kind="stable")
+    return daily_activity, peak_hours
+
+
+def aggregate_cdr(df: pd.DataFrame, top_n: int = 10) -> dict:
+    """
+    Summary, top-caller, per-day and per-hour aggregates of `df`
+    (msisdn, duration, timestamp columns) in one fused pass.
+    """
+    duration = pd.to_numeric(df["duration"], errors="coerce")
+    values = duration.to_numpy(dtype=float, na_value=np.nan)
+    has_duration = ~np.isnan(values)
+    values = np.where(has_duration, values, 0.0)
+
+    total_duration = values.sum()
+    avg_duration = total_duration / has_duration.sum() if has_duration.any() else np.nan
+
+    top_callers = _caller_aggregates(df["msisdn"], values, has_duration, top_n)
+    if pd.api.types.is_integer_dtype(duration.dtype):
+        top_callers["total_duration"] = top_callers["total_duration"].astype(np.int64)
+
+    daily_activity, peak_hours = _time_aggregates(
+        _timestamp_values(df["timestamp"]), df["msisdn"].notna().to_numpy()
+    )
+    return {
+        "total_calls": len(df),
+        "total_duration": total_duration,
+        "avg_duration": avg_duration,
+        "top_callers": top_callers,
+        "daily_activity": daily_activity,
+        "peak_hours": peak_hours,
+    }
 
 
 # =====================================================
 # MAIN ANALYSIS FUNCTION
 # =====================================================
-def analyze_cdr(df: pd.DataFrame):
+def _from_compact(frame: CompactCDRFrame) -> pd.DataFrame:
+    df = frame.to_frame(ENGINE_COLUMNS + ["caller", "receiver"])
+    if "msisdn" not in df.columns:
+        df = df.rename(columns={"caller": "msisdn", "receiver": "other_party"})
+    return df
+
+
+def analyze_cdr(df):
+    if isinstance(df, CompactCDRFrame):
+        df = _from_compact(df)
+
     if df.empty:
         return {
             "summary": {},
@@ -25,58 +153,13 @@ def analyze_cdr(df: pd.DataFrame):
             "insights": ["No data available"]
         }
 
-    df = df.copy()
-
-    # Ensure timestamp is datetime
-    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
-
-    df["date"] = df["timestamp"].dt.date
-    df["hour"] = df["timestamp"].dt.hour
-
-    # =================================================
-    # CALL FREQUENCY & DURATION
-    # =================================================
-    total_calls = len(df)
-    total_duration = df["duration"].sum()
-    avg_duration = df["duration"].mean()
-
-    # =================================================
-    # TOP COMMUNICATORS
-    # =================================================
-    top_callers = (
-        df.groupby("msisdn")
-        .agg(
-            total_calls=("msisdn", "count"),
-            total_duration=("duration", "sum"),
-            avg_duration=("duration", "mean")
-        )
-        .sort_values("total_calls", ascending=False)
-        .head(10)
-        .reset_index()
-    )
-
-    # =================================================
-    # FIRST & LAST CALL PER DAY
-    # =================================================
-    daily_activity = (
-        df.groupby("date")
-        .agg(
-            first_call=("timestamp", "min"),
-            last_call=("timestamp", "max"),
-            total_calls=("msisdn", "count")
-        )
-        .reset_index()
-    )
-
-    # =================================================
-    # PEAK CALL HOURS
-    # =================================================
-    peak_hours = (
-        df.groupby("hour")
-        .size()
-        .reset_index(name="call_count")
-        .sort_values("call_count", ascending=False)
-    )
+    aggregates = aggregate_cdr(df)
+    total_calls = aggregates["total_calls"]
+    total_duration = aggregates["total_duration"]
+    avg_duration = aggregates["avg_duration"]
+    top_callers = aggregates["top_callers"]
+    daily_activity = aggregates["daily_activity"]
+    peak_hours = aggregates["peak_hours"]
 
     # =================================================
     # INTELLIGENCE INSIGHTS
@@ -119,3 +202,20 @@ def analyze_cdr(df: pd.DataFrame):
         "peak_hours": peak_hours,
         "insights": insights
     }
+
+
+# =====================================================
+# CASE STORE ENTRY POINT
+# =====================================================
+def analyze_case(store, case_id: str, **filters):
+    """
+    Analyze one case straight from the columnar CaseStore.
+
+    Only the columns this engine uses are read, and `filters`
+    (callers, receivers, start, end, ...) are pushed down into the scan.
+    """
+    df = store.scan(
+        case_id, columns=["caller", "receiver", "duration", "timestamp"], **filters
+    )
+    df = df.rename(columns={"caller": "msisdn", "receiver": "other_party"})
+    return analyze_cdr(df)
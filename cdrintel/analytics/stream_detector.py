@@ -0,0 +1,227 @@
+import inspect
+from collections import OrderedDict, deque
+from datetime import datetime
+
+import pandas as pd
+
+from cdrintel.ingestion.msisdn import DEFAULT_COUNTRY
+
+
+# =====================================================
+# STREAMING FRAUD DETECTION
+# =====================================================
+# CDR records are consumed one at a time (see cdrintel.ingestion.live_sources)
+# and folded into sliding event-time windows held in memory:
+#
+#   caller  -> calls (burst), night calls, international destinations (fan-out)
+#   SIM     -> devices it appeared in (SIM swap / cloning)
+#   device  -> SIMs used in it (SIM box, burner handsets)
+#
+# Each key space is an LRU bounded by max_keys, so memory stays flat on an
+# endless feed: the least recently active keys are evicted first. Alerts are
+# returned from process() as soon as the record that crosses a threshold
+# arrives; a key alerts at most once per window for each alert type.
+
+WINDOW_SECONDS = 3600
+BURST_THRESHOLD = 20        # calls by one caller in the window
+NIGHT_CALL_THRESHOLD = 5    # night calls by one caller in the window
+NIGHT_HOURS = (0, 5)        # inclusive
+CHURN_THRESHOLD = 3         # distinct devices per SIM / SIMs per device
+FANOUT_THRESHOLD = 5        # distinct international destinations per caller
+MAX_KEYS = 100_000          # per key space
+
+# Record fields across the normalized schema and the realtime fraud export
+FIELDS = {
+    "caller": ("caller", "msisdn", "MSISDN", "caller_id"),
+    "callee": ("callee", "receiver", "other_party", "receiver_id"),
+    "timestamp": ("timestamp", "start_time"),
+    "sim": ("imsi", "IMSI", "sim_id"),
+    "device": ("imei", "IMEI", "device_id"),
+}
+
+
+def _field(record, name):
+    for key in FIELDS[name]:
+        value = record.get(key)
+        if value is not None and value != "":
+            return value
+    return None
+
+
+def _datetime(value):
+    if isinstance(value, datetime):  # includes pd.Timestamp
+        return value
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value)
+    return pd.Timestamp(value)
+
+
+class _Window:
+    """Events of one key inside the sliding window, with per-value counts."""
+
+    __slots__ = ("events", "counts", "alerted_at")
+
+    def __init__(self):
+        self.events = deque()   # (epoch seconds, value)
+        self.counts = {}        # value -> occurrences in window
+        self.alerted_at = None
+
+    def add(self, t, value, cutoff):
+        while self.events and self.events[0][0] <= cutoff:
+            _, old = self.events.popleft()
+            if self.counts[old] == 1:
+                del self.counts[old]
+            else:
+                self.counts[old] -= 1
+        self.events.append((t, value))
+        self.counts[value] = self.counts.get(value, 0) + 1
+
+    @property
+    def total(self):
+        return len(self.events)
+
+    @property
+    def distinct(self):
+        return len(self.counts)
+
+
+class _KeySpace:
+    """LRU of key -> _Window, bounded by max_keys."""
+
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self.windows = OrderedDict()
+        self.evicted = 0
+
+    def touch(self, key):
+        window = self.windows.get(key)
+        if window is None:
+            window = self.windows[key] = _Window()
+            if len(self.windows) > self.max_keys:
+                self.windows.popitem(last=False)
+                self.evicted += 1
+        else:
+            self.windows.move_to_end(key)
+        return window
+
+    def __len__(self):
+        return len(self.windows)
+
+
+class StreamDetector:
+    def __init__(
+        self,
+        window_seconds=WINDOW_SECONDS,
+        burst_threshold=BURST_THRESHOLD,
+        night_call_threshold=NIGHT_CALL_THRESHOLD,
+        night_hours=NIGHT_HOURS,
+        churn_threshold=CHURN_THRESHOLD,
+        fanout_threshold=FANOUT_THRESHOLD,
+        max_keys=MAX_KEYS,
+        home_country=DEFAULT_COUNTRY,
+    ):
+        self.window_seconds = window_seconds
+        self.night_hours = night_hours
+        self.home_country = home_country
+        # alert type -> (key space, threshold, measure)
+        self.rules = {
+            "burst": (_KeySpace(max_keys), burst_threshold, "total"),
+            "night_calls": (_KeySpace(max_keys), night_call_threshold, "total"),
+            "international_fanout": (_KeySpace(max_keys), fanout_threshold, "distinct"),
+            "sim_churn": (_KeySpace(max_keys), churn_threshold, "distinct"),
+            "device_churn": (_KeySpace(max_keys), churn_threshold, "distinct"),
+        }
+        self.records = 0
+        self.alerts = 0
+
+    # -------------------------------------------------
+    # CLASSIFICATION
+    # -------------------------------------------------
+    def _is_night(self, record, when):
+        flag = record.get("is_night_call")
+        if flag is not None and flag != "":
+            return str(flag) in ("1", "True", "true")
+        return self.night_hours[0] <= when.hour <= self.night_hours[1]
+
+    def _is_international(self, record, callee):
+        call_type = record.get("call_type")
+        if call_type:
+            return call_type == "international"
+        origin, dest = record.get("country_origin"), record.get("country_dest")
+        if origin and dest:
+            return origin != dest
+        text = str(callee)
+        return text.startswith("+") and not text.startswith(f"+{self.home_country}")
+
+    # -------------------------------------------------
+    # PROCESSING
+    # -------------------------------------------------
+    def _observe(self, rule, key, t, value, record):
+        space, threshold, measure = self.rules[rule]
+        window = space.touch(key)
+        window.add(t, value, t - self.window_seconds)
+        count = getattr(window, measure)
+        if count < threshold:
+            return None
+        if window.alerted_at is not None and t - window.alerted_at < self.window_seconds:
+            return None
+        window.alerted_at = t
+        return {
+            "type": rule,
+            "key": key,
+            "count": count,
+            "threshold": threshold,
+            "window_seconds": self.window_seconds,
+            "timestamp": t,
+            "record": record,
+        }
+
+    def process(self, record):
+        """Fold one CDR record (a dict) into the windows; returns the alerts it raises."""
+        timestamp = _field(record, "timestamp")
+        if timestamp is None:
+            return []
+        when = _datetime(timestamp)
+        t = when.timestamp()
+        caller = _field(record, "caller")
+        callee = _field(record, "callee")
+        sim = _field(record, "sim")
+        device = _field(record, "device")
+        self.records += 1
+
+        alerts = []
+        if caller is not None:
+            alerts.append(self._observe("burst", caller, t, None, record))
+            if self._is_night(record, when):
+                alerts.append(self._observe("night_calls", caller, t, None, record))
+            if callee is not None and self._is_international(record, callee):
+                alerts.append(self._observe("international_fanout", caller, t, callee, record))
+        if sim is not None and device is not None:
+            alerts.append(self._observe("sim_churn", sim, t, device, record))
+            alerts.append(self._observe("device_churn", device, t, sim, record))
+
+        alerts = [alert for alert in alerts if alert is not None]
+        self.alerts += len(alerts)
+        return alerts
+
+    async def run(self, source, on_alert=None):
+        """
+        Consume the async record iterator `source` until it ends. `on_alert`
+        (a function or coroutine function) is called with every alert.
+        """
+        async for record in source:
+            for alert in self.process(record):
+                if on_alert is not None:
+                    result = on_alert(alert)
+                    if inspect.isawaitable(result):
+                        await result
+
+    def stats(self):
+        return {
+            "records": self.records,
+            "alerts": self.alerts,
+            "keys": {rule: len(space) for rule, (space, _, _) in self.rules.items()},
+            "evicted": {rule: space.evicted for rule, (space, _, _) in self.rules.items()},
+        }
@@ -0,0 +1,162 @@
+import io
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # pragma: no cover - pyarrow is optional here
+    pa = None
+
+
+# =====================================================
+# TYPED CDR CSV READER
+# =====================================================
+# Column types are declared up front for every known CDR layout instead of
+# being inferred. Numbers (MSISDN, IMSI, IMEI) stay strings so leading zeros
+# and country codes survive, low-cardinality labels become categoricals and
+# call times are parsed to datetime64 by the reader itself.
+#
+# Columns are matched case-insensitively; columns outside the layouts keep
+# pandas' inferred type.
+
+IDENTIFIER = "string"
+LABEL = "category"
+DATETIME = "datetime64[ns]"
+
+CDR_LAYOUTS = {
+    # Operator exports handled by app.ingestion
+    "operator": {
+        "msisdn": IDENTIFIER, "phone": IDENTIFIER,
+        "other_party": IDENTIFIER, "receiver": IDENTIFIER,
+        "imsi": IDENTIFIER, "imei": IDENTIFIER,
+        "cell_tower": IDENTIFIER, "tower_id": IDENTIFIER,
+        "timestamp": DATETIME, "call_time": DATETIME,
+        "call_type": LABEL, "country": LABEL,
+        "duration": "float64",
+    },
+    # Dashboard exports
+    "dashboard": {
+        "caller": IDENTIFIER, "receiver": IDENTIFIER,
+        "calling_number": IDENTIFIER, "called_number": IDENTIFIER,
+        "timestamp": DATETIME, "call_time": DATETIME,
+        "call_type": LABEL, "country": LABEL,
+        "duration": "float64", "call_duration": "float64",
+    },
+    # Realtime fraud dataset (cdr_files/realtime_cdr_fraud_dataset.csv)
+    "fraud": {
+        "caller_id": IDENTIFIER, "receiver_id": IDENTIFIER,
+        "sim_id": IDENTIFIER, "device_id": IDENTIFIER,
+        "start_time": DATETIME,
+        "duration_sec": "float64",
+        "call_type": LABEL,
+        "location_origin": LABEL, "country_origin": LABEL,
+        "location_dest": LABEL, "country_dest": LABEL,
+        "is_night_call": "int8",
+        "transaction_status": LABEL, "fraud_type": LABEL,
+    },
+}
+
+
+def column_types(columns, layout=None):
+    """
+    {column: dtype} for the `columns` of a file, keyed by their original names.
+    With `layout` None every known layout is consulted.
+    """
+    layouts = [CDR_LAYOUTS[layout]] if layout else CDR_LAYOUTS.values()
+    known = {}
+    for spec in layouts:
+        for name, dtype in spec.items():
+            known.setdefault(name, dtype)
+    types = {}
+    for column in columns:
+        dtype = known.get(str(column).strip().lower())
+        if dtype is not None:
+            types[column] = dtype
+    return types
+
+
+def _read_header(source):
+    if hasattr(source, "read"):
+        position = source.tell()
+        header = pd.read_csv(source, nrows=0).columns
+        source.seek(position)
+        return list(header)
+    return list(pd.read_csv(source, nrows=0).columns)
+
+
+def _read_kwargs(types):
+    dtype = {c: t for c, t in types.items() if t != DATETIME}
+    dates = [c for c, t in types.items() if t == DATETIME]
+    return {"dtype": dtype, "parse_dates": dates}
+
+
+def _finish(df, types):
+    for column, dtype in types.items():
+        if dtype == DATETIME and column in df.columns:
+            # parse_dates leaves columns with unparseable values as text
+            df[column] = pd.to_datetime(df[column], errors="coerce").astype(DATETIME)
+    return df
+
+
+def _arrow_type(dtype):
+    return {
+        IDENTIFIER: pa.string(),
+        LABEL: pa.dictionary(pa.int32(), pa.string()),
+        DATETIME: pa.timestamp("ns"),
+    }.get(dtype) or pa.from_numpy_dtype(dtype)
+
+
+def _read_arrow(source, types):
+    # pandas' own pyarrow engine applies `dtype` after inference, which has
+    # already stripped leading zeros, so the types go straight to pyarrow
+    options = pa_csv.ConvertOptions(column_types={c: _arrow_type(t) for c, t in types.items()})
+    df = pa_csv.read_csv(source, convert_options=options).to_pandas()
+    for column, dtype in types.items():
+        if dtype == IDENTIFIER:
+            df[column] = df[column].astype(IDENTIFIER)
+    return df
+
+
+def read_cdr_csv(source, layout=None, engine=None):
+    """
+    Read a CDR CSV (path or binary file object) with declared column types.
+
+    Uses pyarrow's multithreaded reader when it is installed and falls back to
+    the pandas C engine for files pyarrow cannot parse with those types.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    types = column_types(_read_header(source), layout)
+    engine = engine or ("pyarrow" if pa is not None else "c")
+    position = source.tell() if hasattr(source, "read") else None
+
+    if engine == "pyarrow":
+        try:
+            return _read_arrow(source, types)
+        except (pa.ArrowInvalid, ValueError):
+            # e.g. ragged rows or values that do not fit the declared type
+            if position is not None:
+                source.seek(position)
+    try:
+        return _finish(pd.read_csv(source, engine="c", **_read_kwargs(types)), types)
+    except ValueError as e:
+        if isinstance(e, pd.errors.ParserError):
+            raise
+        # A numeric column holds text or blanks: keep the string and category
+        # declarations, infer the rest
+        if position is not None:
+            source.seek(position)
+        types = {c: t for c, t in types.items() if t in (IDENTIFIER, LABEL, DATETIME)}
+        return _finish(pd.read_csv(source, engine="c", **_read_kwargs(types)), types)
+
+
+def iter_cdr_csv(source, chunk_rows, layout=None):
+    """
+    Yield typed DataFrames of at most `chunk_rows` rows. Chunked reads always
+    use the C engine; pyarrow's pandas engine has no chunksize support.
+    """
+    types = column_types(_read_header(source), layout)
+    with pd.read_csv(source, chunksize=chunk_rows, engine="c", **_read_kwargs(types)) as reader:
+        for chunk in reader:
+            yield _finish(chunk, types)
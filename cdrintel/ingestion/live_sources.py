@@ -0,0 +1,121 @@
+import asyncio
+import csv
+import json
+import os
+from datetime import datetime
+
+
+# =====================================================
+# LIVE CDR SOURCES
+# =====================================================
+# Async iterators of CDR records (one dict per call) for the streaming
+# detector in cdrintel.analytics.stream_detector:
+#
+#   tail_csv       follow a CSV file as a switch or mediation system appends to it
+#   socket_source  newline-delimited JSON records sent to a local TCP port
+#   replay_csv     an existing export, optionally paced by its own timestamps
+#
+# Values are kept as the strings they arrived as; the detector parses only
+# the fields it uses.
+
+POLL_INTERVAL = 0.2        # seconds between checks for new lines
+SOCKET_QUEUE_SIZE = 10_000  # records buffered before senders are back-pressured
+
+
+def _parse_line(line, header):
+    values = next(csv.reader([line]))
+    return dict(zip(header, values))
+
+
+async def tail_csv(path, poll_interval=POLL_INTERVAL, from_start=True, idle_timeout=None):
+    """
+    Yield rows of a CSV file as they are appended. The header is read
+    first; a partially written last line is held back until it is complete.
+    If the file shrinks (rotated or truncated) it is read again from the top.
+    Ends after `idle_timeout` seconds without new data, or never if None.
+    """
+    while not os.path.exists(path):
+        await asyncio.sleep(poll_interval)
+
+    f = open(path, newline="")
+    try:
+        header = None
+        pending = ""
+        idle = 0.0
+        if not from_start:
+            header = next(csv.reader([f.readline()]), None)
+            f.seek(0, os.SEEK_END)
+        while True:
+            line = f.readline()
+            if not line:
+                if os.path.getsize(path) < f.tell():
+                    f.seek(0)
+                    header, pending = None, ""
+                    continue
+                if idle_timeout is not None and idle >= idle_timeout:
+                    return
+                await asyncio.sleep(poll_interval)
+                idle += poll_interval
+                continue
+            idle = 0.0
+            pending += line
+            if not pending.endswith("\n"):
+                continue
+            line, pending = pending.rstrip("\r\n"), ""
+            if not line:
+                continue
+            if header is None:
+                header = next(csv.reader([line]))
+                continue
+            yield _parse_line(line, header)
+    finally:
+        f.close()
+
+
+async def socket_source(host="127.0.0.1", port=9009, queue_size=SOCKET_QUEUE_SIZE, ready=None):
+    """
+    Listen on host:port and yield every JSON record sent by any client, one
+    object per line. `ready` (an asyncio.Event) is set once the port is open.
+    The server stops when the iterator is closed.
+    """
+    queue = asyncio.Queue(maxsize=queue_size)
+
+    async def handle(reader, writer):
+        try:
+            async for line in reader:
+                line = line.strip()
+                if line:
+                    await queue.put(json.loads(line))
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    if ready is not None:
+        ready.set()
+    try:
+        while True:
+            yield await queue.get()
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+async def replay_csv(path, speed=None, limit=None, time_field="start_time"):
+    """
+    Yield the rows of a CSV export in file order. With `speed`, gaps between
+    consecutive `time_field` values are replayed scaled by 1/speed (2.0 plays
+    twice as fast as recorded); without it rows are yielded back to back.
+    """
+    previous = None
+    with open(path, newline="") as f:
+        for count, record in enumerate(csv.DictReader(f)):
+            if limit is not None and count >= limit:
+                return
+            if speed:
+                current = datetime.fromisoformat(record[time_field])
+                if previous is not None and current > previous:
+                    await asyncio.sleep((current - previous).total_seconds() / speed)
+                previous = current
+            elif count % 1000 == 0:
+                await asyncio.sleep(0)  # let other tasks run
+            yield record
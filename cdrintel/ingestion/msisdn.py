@@ -0,0 +1,86 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = "string[pyarrow]"  # Arrow compute kernels for the str ops
+except ImportError:  # pragma: no cover - pyarrow is optional here
+    STRING_DTYPE = "string"
+
+
+# =====================================================
+# MSISDN CANONICALIZATION
+# =====================================================
+# Subscriber numbers arrive as 0712345678, 712345678, 254712345678,
+# +254 712 345 678 or 00254712345678 depending on the export. All of them are
+# rewritten to E.164 (+254712345678) against a default country, so one
+# subscriber is one key in every count and graph.
+#
+# Work is done per distinct number: a column is factorized and only the
+# unique values go through the (Arrow-backed) vectorized string ops. Nothing
+# is kept between calls, so ingestion workers stay at a bounded footprint.
+
+DEFAULT_COUNTRY = os.environ.get("CDR_DEFAULT_COUNTRY", "254")
+
+# National significant number length per country calling code
+NATIONAL_NUMBER_LENGTH = {
+    "20": 10,   # EG
+    "27": 9,    # ZA
+    "233": 9,   # GH
+    "234": 10,  # NG
+    "251": 9,   # ET
+    "254": 9,   # KE
+    "255": 9,   # TZ
+    "256": 9,   # UG
+    "250": 9,   # RW
+}
+
+
+def _canonicalize_unique(raw: pd.Series, country: str) -> pd.Series:
+    text = raw.astype(STRING_DTYPE).str.strip()
+    digits = text.str.replace(r"\D", "", regex=True)
+    plus = text.str.startswith("+").to_numpy(dtype=bool, na_value=False)
+    idd = ~plus & digits.str.startswith("00").to_numpy(dtype=bool, na_value=False)
+    digits = digits.mask(idd, digits.str[2:])
+    length = digits.str.len().to_numpy(dtype=np.int64, na_value=0)
+
+    national = NATIONAL_NUMBER_LENGTH.get(country)
+    has_prefix = digits.str.startswith(country).to_numpy(dtype=bool, na_value=False)
+    leading_zero = digits.str.startswith("0").to_numpy(dtype=bool, na_value=False)
+    international = plus | idd
+    local = ~international
+    if national:
+        has_country = local & has_prefix & (length == len(country) + national)
+        trunk = local & ~has_country & leading_zero & (length == national + 1)
+        bare = local & ~has_country & ~trunk & ~leading_zero & (length == national)
+    else:
+        has_country = local & has_prefix & (length > len(country) + 6)
+        trunk = local & ~has_country & leading_zero
+        bare = np.zeros(len(raw), dtype=bool)
+
+    # Numbers that match no rule (short codes, foreign numbers without a
+    # prefix) keep their digits unchanged. One concat builds the rest.
+    prefix = np.select([international | has_country, trunk | bare], ["+", "+" + country], "")
+    body = digits.mask(trunk, digits.str[1:]) if trunk.any() else digits
+    canonical = pd.Series(prefix, index=digits.index, dtype=STRING_DTYPE) + body
+    return canonical.mask(length == 0)
+
+
+def canonicalize_msisdn(values, default_country=DEFAULT_COUNTRY) -> pd.Series:
+    """
+    E.164 form of every number in `values`, as a string Series aligned with
+    the input. Missing or digit-less values become <NA>.
+    """
+    values = values if isinstance(values, pd.Series) else pd.Series(values)
+    if pd.api.types.is_float_dtype(values.dtype):
+        # 712345678.0 from an integer column that held blanks
+        values = values.astype("Int64")
+
+    codes, uniques = pd.factorize(values)
+    if len(uniques) == 0:
+        return pd.Series(pd.NA, index=values.index, dtype="string")
+    canonical = _canonicalize_unique(pd.Series(uniques), default_country)
+    result = canonical.array.take(codes, allow_fill=True)
+    return pd.Series(result, index=values.index).astype("string")
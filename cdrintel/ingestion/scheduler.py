@@ -0,0 +1,65 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+# =====================================================
+# PARALLEL TASK SCHEDULER
+# =====================================================
+# Fans independent parsing tasks out over a worker pool while keeping at most
+# `max_pending` tasks in flight, so results never pile up faster than the
+# caller consumes them. A failing task is reported, not raised, so one corrupt
+# file does not abort the rest of the evidence.
+#
+# Processes are forked where the platform supports it. Spawned workers would
+# re-import the caller's __main__ (e.g. the dashboard script, which loads data
+# at import time), so without fork the pool falls back to threads.
+
+_NO_TASK = object()
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def _make_executor(max_workers):
+    if "fork" in multiprocessing.get_all_start_methods():
+        return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("fork"))
+    return ThreadPoolExecutor(max_workers=max_workers)
+
+
+def run_tasks(fn, tasks, *args, max_workers=None, max_pending=None):
+    """
+    Run fn(task, *args) for every task in parallel.
+
+    Yields (task, result, error) in completion order; error is None on success
+    and the exception otherwise. With max_workers=1 tasks run in-process.
+    """
+    max_workers = max_workers or default_workers()
+    tasks = iter(tasks)
+
+    if max_workers == 1:
+        for task in tasks:
+            try:
+                yield task, fn(task, *args), None
+            except Exception as e:
+                yield task, None, e
+        return
+
+    max_pending = max_pending or 2 * max_workers
+    with _make_executor(max_workers) as executor:
+        pending = {}
+        for task in tasks:
+            pending[executor.submit(fn, task, *args)] = task
+            if len(pending) >= max_pending:
+                break
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                task = pending.pop(future)
+                error = future.exception()
+                yield task, (None if error else future.result()), error
+                next_task = next(tasks, _NO_TASK)
+                if next_task is not _NO_TASK:
+                    pending[executor.submit(fn, next_task, *args)] = next_task
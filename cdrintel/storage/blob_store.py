@@ -0,0 +1,190 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import uuid
+from pathlib import Path
+
+from cdrintel.storage.chunked_upload import ChecksumMismatch, is_sha256, write_and_hash
+
+
+# =====================================================
+# CONTENT-ADDRESSED BLOB STORE
+# =====================================================
+# Evidence bytes are stored once per SHA-256, in sharded directories:
+#
+#   <root>/ab/cd/abcd...ef      (read-only)
+#
+# Every upload record / file id that points at a blob holds a named
+# reference; the blob is deleted when its last reference is released.
+# Placement and reference counting run inside one SQLite IMMEDIATE
+# transaction, which also serializes them across worker processes.
+#
+# When the caller declares the expected hash and the blob already exists,
+# the incoming stream is only hashed (to prove the client has the bytes),
+# never written.
+
+DEFAULT_ROOT = os.environ.get("CDR_BLOB_STORE", "blob_store")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS refs (
+    sha256 TEXT NOT NULL,
+    ref    TEXT NOT NULL,
+    PRIMARY KEY (sha256, ref)
+);
+"""
+
+
+class BlobTooLarge(ValueError):
+    pass
+
+
+class BlobStore:
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = Path(root)
+        self.tmp_dir = self.root / "tmp"
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.root / "refs.db"), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    # -------------------------------------------------
+    # READ
+    # -------------------------------------------------
+    def path(self, sha256) -> Path:
+        if not is_sha256(sha256):
+            raise ValueError("not a SHA-256 hex digest")
+        sha256 = sha256.lower()
+        return self.root / sha256[:2] / sha256[2:4] / sha256
+
+    def exists(self, sha256):
+        return self.path(sha256).is_file()
+
+    def refs(self, sha256):
+        rows = self._connect().execute("SELECT ref FROM refs WHERE sha256 = ?", (sha256.lower(),))
+        return [row[0] for row in rows]
+
+    # -------------------------------------------------
+    # WRITE
+    # -------------------------------------------------
+    def temp_path(self):
+        """Scratch file on the store's filesystem, so adopt() is a rename."""
+        return self.tmp_dir / f"{uuid.uuid4().hex}.part"
+
+    def adopt(self, tmp_path, sha256, ref):
+        """
+        Move a fully written file into the store under `sha256` and add `ref`.
+        If the blob already exists the file is discarded. Returns True when
+        the blob was newly created.
+        """
+        target = self.path(sha256)
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            created = not target.is_file()
+            if created:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.chmod(tmp_path, 0o444)
+                os.replace(tmp_path, target)
+            conn.execute("INSERT OR IGNORE INTO refs (sha256, ref) VALUES (?, ?)", (sha256.lower(), ref))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return created
+
+    def add_ref(self, sha256, ref):
+        """Reference an existing blob; False when there is no such blob."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            present = self.exists(sha256)
+            if present:
+                conn.execute("INSERT OR IGNORE INTO refs (sha256, ref) VALUES (?, ?)", (sha256.lower(), ref))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return present
+
+    def release(self, sha256, ref):
+        """Drop `ref`; deletes the blob once nothing references it. Returns refs left."""
+        sha256 = sha256.lower()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM refs WHERE sha256 = ? AND ref = ?", (sha256, ref))
+            left = conn.execute("SELECT COUNT(*) FROM refs WHERE sha256 = ?", (sha256,)).fetchone()[0]
+            if left == 0 and self.exists(sha256):
+                os.remove(self.path(sha256))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return left
+
+    async def write_stream(self, chunks, ref, expected_sha256=None, max_size=None):
+        """
+        Store the bytes of the async iterator `chunks` and reference them as
+        `ref`. Returns (sha256, size, created).
+
+        With `expected_sha256` naming a blob that already exists nothing is
+        written: the stream is hashed and checked against it. Raises
+        BlobTooLarge past `max_size` bytes and ChecksumMismatch when the
+        bytes do not match `expected_sha256`.
+        """
+        expected = expected_sha256.lower() if expected_sha256 else None
+        known = expected is not None and self.exists(expected)
+
+        digest = hashlib.sha256()
+        size = 0
+        tmp_path = None if known else self.temp_path()
+        f = None if known else await asyncio.to_thread(open, tmp_path, "wb")
+        try:
+            async for data in chunks:
+                size += len(data)
+                if max_size is not None and size > max_size:
+                    raise BlobTooLarge("File too large")
+                if known:
+                    digest.update(data)
+                else:
+                    await asyncio.to_thread(write_and_hash, f, digest, data)
+            if f is not None:
+                await asyncio.to_thread(f.close)
+            sha256 = digest.hexdigest()
+            if expected is not None and sha256 != expected:
+                raise ChecksumMismatch("content does not match the declared SHA-256")
+        except BaseException:
+            if f is not None:
+                f.close()
+                os.remove(tmp_path)
+            raise
+
+        if known and await asyncio.to_thread(self.add_ref, sha256, ref):
+            return sha256, size, False
+        if known:
+            # The blob was released while the stream was being verified
+            raise FileNotFoundError("blob was deleted during the upload; retry")
+        created = await asyncio.to_thread(self.adopt, tmp_path, sha256, ref)
+        return sha256, size, created
+
+
+async def iter_upload(upload, chunk_size=1024 * 1024):
+    """Async byte iterator over a Starlette UploadFile."""
+    while True:
+        data = await upload.read(chunk_size)
+        if not data:
+            break
+        yield data
+
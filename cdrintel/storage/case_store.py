@@ -0,0 +1,253 @@
+import hashlib
+import json
+import os
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+
+# =====================================================
+# COLUMNAR CASE STORE
+# =====================================================
+# Ingested CDRs are written once to Parquet, partitioned as
+#
+#   <root>/case_id=<case>/date=<YYYY-MM-DD>/part-*.parquet
+#
+# Reads prune partitions by case and date and push caller/receiver/time
+# predicates and column projections down into the Parquet scan, so a query
+# only touches the files and row groups it needs.
+#
+# _sources.json records, for every source file converted, its size, mtime,
+# SHA-256 and the part files it produced. A source whose content changed is
+# converted again and its earlier parts are deleted; one that was only
+# touched (same hash) is not converted again.
+
+DEFAULT_ROOT = os.environ.get("CDR_CASE_STORE", "case_store")
+
+# Columns with a fixed type; any other column keeps its inferred type
+CORE_SCHEMA = pa.schema([
+    ("caller", pa.string()),
+    ("receiver", pa.string()),
+    ("timestamp", pa.timestamp("ns")),
+    ("duration", pa.float64()),
+])
+
+PARTITIONING = ds.partitioning(
+    pa.schema([("case_id", pa.string()), ("date", pa.string())]), flavor="hive"
+)
+
+SOURCES_FILE = "_sources.json"
+
+
+class CaseStore:
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+        self._schemas = {}  # case_id (None = all cases) -> unified schema
+        os.makedirs(root, exist_ok=True)
+
+    # -------------------------------------------------
+    # WRITE
+    # -------------------------------------------------
+    def append(self, df: pd.DataFrame, case_id: str, source: str = None):
+        """
+        Append normalized CDRs to a case. `source` (a file path) is recorded so
+        the same file is not converted again (see is_ingested); rows written
+        earlier for the same source are replaced.
+        """
+        parts = []
+        if not df.empty:
+            df = conform_frame(df)
+            df["case_id"] = case_id
+            df["date"] = df["timestamp"].dt.strftime("%Y-%m-%d").fillna("unknown")
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            table = table.cast(_with_core_types(table.schema))
+            ds.write_dataset(
+                table,
+                self.root,
+                format="parquet",
+                partitioning=PARTITIONING,
+                basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+                existing_data_behavior="overwrite_or_ignore",
+                file_visitor=lambda written: parts.append(os.path.relpath(written.path, self.root)),
+            )
+        if source:
+            previous = self._record_source(source, case_id, parts)
+            if previous is not None:
+                # The new parts are recorded first, so a crash never loses the source
+                for part in previous.get("parts", []):
+                    path = os.path.join(self.root, part)
+                    if os.path.exists(path):
+                        os.remove(path)
+                self._schemas.pop(previous["case_id"], None)
+        self._schemas.pop(case_id, None)
+        self._schemas.pop(None, None)
+        return len(df)
+
+    # -------------------------------------------------
+    # SOURCE MANIFEST
+    # -------------------------------------------------
+    def _sources_path(self):
+        return os.path.join(self.root, SOURCES_FILE)
+
+    def _load_sources(self):
+        if not os.path.exists(self._sources_path()):
+            return {}
+        with open(self._sources_path()) as f:
+            return json.load(f)
+
+    def _save_sources(self, sources):
+        tmp_path = self._sources_path() + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(sources, f, indent=2)
+        os.replace(tmp_path, self._sources_path())
+
+    def _record_source(self, source, case_id, parts):
+        """Record `source` as converted into `parts`; returns the entry it replaced."""
+        sources = self._load_sources()
+        key = os.path.abspath(source)
+        stat = os.stat(source)
+        previous = sources.get(key)
+        sources[key] = {
+            "case_id": case_id, "size": stat.st_size, "mtime": stat.st_mtime,
+            "sha256": _file_sha256(source), "parts": parts,
+        }
+        self._save_sources(sources)
+        return previous
+
+    def is_recorded(self, source):
+        """True if `source` was converted before, whether or not it changed since."""
+        return os.path.abspath(source) in self._load_sources()
+
+    def is_ingested(self, source, case_id=None):
+        """True if `source` was already converted and its content has not changed since."""
+        sources = self._load_sources()
+        key = os.path.abspath(source)
+        entry = sources.get(key)
+        if entry is None:
+            return False
+        if case_id is not None and entry["case_id"] != case_id:
+            return False
+        stat = os.stat(source)
+        if entry["size"] != stat.st_size:
+            return False
+        if entry["mtime"] == stat.st_mtime:
+            return True
+        # Touched or rewritten with the same size: compare content
+        if entry.get("sha256") != _file_sha256(source):
+            return False
+        entry["mtime"] = stat.st_mtime
+        self._save_sources(sources)
+        return True
+
+    # -------------------------------------------------
+    # READ
+    # -------------------------------------------------
+    def _dataset(self, case_id=None):
+        base = self.root if case_id is None else os.path.join(self.root, f"case_id={case_id}")
+        files = [
+            os.path.join(dirpath, name)
+            for dirpath, _, names in os.walk(base)
+            for name in names if name.endswith(".parquet")
+        ]
+        if not files:
+            return None
+        schema = self._schemas.get(case_id)
+        if schema is None:
+            # Files may carry different optional columns; unify once per change
+            schema = pa.unify_schemas(
+                [ds.dataset(f, format="parquet").schema for f in files] + [PARTITIONING.schema],
+                promote_options="permissive",
+            )
+            self._schemas[case_id] = schema
+        return ds.dataset(
+            files, schema=schema, format="parquet",
+            partitioning=PARTITIONING, partition_base_dir=self.root,
+        )
+
+    def cases(self):
+        prefix = "case_id="
+        return sorted(
+            name[len(prefix):] for name in os.listdir(self.root) if name.startswith(prefix)
+        )
+
+    def scan(self, case_id=None, callers=None, receivers=None, caller_contains=None,
+             receiver_contains=None, start=None, end=None, columns=None):
+        """
+        Read CDRs matching every given predicate.
+
+        callers/receivers match exact numbers; *_contains is a case-insensitive
+        substring match. start/end bound the timestamp (inclusive). columns
+        limits the columns read from disk.
+        """
+        dataset = self._dataset(case_id)
+        if dataset is None:
+            return pd.DataFrame(columns=columns or [f.name for f in CORE_SCHEMA])
+
+        conditions = []
+        if case_id is not None:
+            conditions.append(ds.field("case_id") == case_id)
+        if callers is not None:
+            conditions.append(ds.field("caller").isin(list(callers)))
+        if receivers is not None:
+            conditions.append(ds.field("receiver").isin(list(receivers)))
+        if caller_contains:
+            conditions.append(pc.match_substring(ds.field("caller"), caller_contains, ignore_case=True))
+        if receiver_contains:
+            conditions.append(pc.match_substring(ds.field("receiver"), receiver_contains, ignore_case=True))
+        if start is not None:
+            start = pd.Timestamp(start)
+            # ISO dates compare correctly as strings, which prunes whole partitions
+            conditions.append(ds.field("date") >= start.strftime("%Y-%m-%d"))
+            conditions.append(ds.field("timestamp") >= pa.scalar(start, pa.timestamp("ns")))
+        if end is not None:
+            end = pd.Timestamp(end)
+            conditions.append(ds.field("date") <= end.strftime("%Y-%m-%d"))
+            conditions.append(ds.field("timestamp") <= pa.scalar(end, pa.timestamp("ns")))
+
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+
+        if columns is not None:
+            columns = [c for c in columns if c in dataset.schema.names]
+        table = dataset.to_table(columns=columns, filter=expression)
+        df = table.to_pandas()
+        return df.drop(columns=[c for c in ("case_id", "date") if c in df.columns and (columns is None or c not in columns)])
+
+
+def conform_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Copy of `df` with the core columns present and typed as they are stored,
+    so in-memory frames match what scan() returns.
+    """
+    df = df.copy()
+    df.columns = [str(c) for c in df.columns]
+    for field in CORE_SCHEMA:
+        if field.name not in df.columns:
+            df[field.name] = None
+    df["caller"] = df["caller"].astype("string")
+    df["receiver"] = df["receiver"].astype("string")
+    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+    df["duration"] = pd.to_numeric(df["duration"], errors="coerce").astype("float64")
+    return df
+
+
+def _file_sha256(path, block_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _with_core_types(schema):
+    fields = []
+    for field in schema:
+        if field.name in CORE_SCHEMA.names:
+            field = CORE_SCHEMA.field(field.name)
+        fields.append(field)
+    return pa.schema(fields)
@@ -0,0 +1,258 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+
+
+# =====================================================
+# RESUMABLE CHUNKED UPLOADS
+# =====================================================
+# Protocol:
+#
+#   create()          -> upload_id, chunk_size, total_chunks
+#   receive_chunk(N)  -> chunk N is streamed to disk, size and optional
+#                        SHA-256 checked, then published atomically
+#   status()          -> which chunks the server holds, with their SHA-256,
+#                        so a client resumes by sending only the missing ones
+#   assemble()        -> chunks concatenated in order into the final file in
+#                        one pass while its SHA-256 is computed
+#
+# Each session is a directory holding manifest.json and one <N>.chunk file
+# per verified chunk, with its digest in <N>.sha256. A chunk file only exists
+# once it is complete, so the directory listing is the session state and
+# concurrent PUTs need no lock. A session is only removed by discard() or
+# expiry: when the assembled file fails the declared SHA-256 the chunks are
+# kept, so the client can compare chunk digests and re-send the bad ones.
+
+DEFAULT_ROOT = os.environ.get("CDR_UPLOAD_SESSIONS", "upload_sessions")
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024   # 8MB
+MIN_CHUNK_SIZE = 1024 * 1024           # bounds a 20GB session to ~20k chunks
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+SESSION_TTL = 7 * 24 * 3600            # unfinished sessions are purged after a week
+COPY_SIZE = 1024 * 1024
+
+MANIFEST = "manifest.json"
+_UPLOAD_ID = re.compile(r"[0-9a-f]{32}")
+_SHA256 = re.compile(r"[0-9a-fA-F]{64}")
+
+
+class UploadSessionNotFound(KeyError):
+    pass
+
+
+class ChunkRejected(ValueError):
+    pass
+
+
+class ChecksumMismatch(ChunkRejected):
+    pass
+
+
+class IncompleteUpload(ValueError):
+    pass
+
+
+def is_sha256(value):
+    """True for a SHA-256 hex digest (either case), as clients may declare one."""
+    return isinstance(value, str) and _SHA256.fullmatch(value) is not None
+
+
+class ChunkedUploadStore:
+    def __init__(self, root=DEFAULT_ROOT, chunk_size=DEFAULT_CHUNK_SIZE, ttl=SESSION_TTL,
+                 min_chunk_size=MIN_CHUNK_SIZE):
+        self.root = root
+        self.chunk_size = chunk_size
+        self.min_chunk_size = min_chunk_size
+        self.ttl = ttl
+        os.makedirs(root, exist_ok=True)
+
+    # -------------------------------------------------
+    # SESSIONS
+    # -------------------------------------------------
+    def _session_dir(self, upload_id):
+        if not _UPLOAD_ID.fullmatch(upload_id or ""):
+            raise UploadSessionNotFound(upload_id)
+        path = os.path.join(self.root, upload_id)
+        if not os.path.isdir(path):
+            raise UploadSessionNotFound(upload_id)
+        return path
+
+    def create(self, filename, total_size, chunk_size=None, sha256=None, **metadata):
+        """
+        Open an upload session. `sha256`, when the client declares it, is
+        checked against the assembled file. `metadata` (case, uploader, ...)
+        is stored with the session and returned by manifest().
+        """
+        chunk_size = chunk_size or self.chunk_size
+        if total_size <= 0:
+            raise ChunkRejected("total_size must be positive")
+        # Only the last chunk may be shorter; a file below the minimum is one chunk
+        if not min(self.min_chunk_size, total_size) <= chunk_size <= MAX_CHUNK_SIZE:
+            raise ChunkRejected(f"chunk_size must be between {self.min_chunk_size} and {MAX_CHUNK_SIZE} bytes")
+        if sha256 and not is_sha256(sha256):
+            raise ChunkRejected("sha256 must be a 64-character hex digest")
+
+        self.purge_expired()
+        upload_id = uuid.uuid4().hex
+        manifest = {
+            "upload_id": upload_id,
+            "filename": filename,
+            "total_size": total_size,
+            "chunk_size": chunk_size,
+            "total_chunks": -(-total_size // chunk_size),
+            "sha256": sha256.lower() if sha256 else None,
+            "created_at": time.time(),
+            "metadata": metadata,
+        }
+        path = os.path.join(self.root, upload_id)
+        os.makedirs(path)
+        with open(os.path.join(path, MANIFEST), "w") as f:
+            json.dump(manifest, f)
+        return manifest
+
+    def manifest(self, upload_id):
+        with open(os.path.join(self._session_dir(upload_id), MANIFEST)) as f:
+            return json.load(f)
+
+    def received(self, upload_id):
+        path = self._session_dir(upload_id)
+        return sorted(int(name[:-len(".chunk")]) for name in os.listdir(path) if name.endswith(".chunk"))
+
+    def chunks(self, upload_id):
+        """
+        [{"index", "sha256", "verified"}] for every chunk held; verified is
+        True when the client sent the chunk with its SHA-256.
+        """
+        path = self._session_dir(upload_id)
+        chunks = []
+        for index in self.received(upload_id):
+            try:
+                with open(os.path.join(path, f"{index}.sha256")) as f:
+                    digest = json.load(f)
+            except FileNotFoundError:
+                digest = {"sha256": None, "verified": False}
+            chunks.append({"index": index, **digest})
+        return chunks
+
+    def unverified_chunks(self, upload_id):
+        """Indexes of chunks received without a client SHA-256, the ones that may be wrong."""
+        return [chunk["index"] for chunk in self.chunks(upload_id) if not chunk["verified"]]
+
+    def status(self, upload_id):
+        manifest = self.manifest(upload_id)
+        chunks = self.chunks(upload_id)
+        received = [chunk["index"] for chunk in chunks]
+        have = set(received)
+        missing = [i for i in range(manifest["total_chunks"]) if i not in have]
+        return {
+            "upload_id": upload_id,
+            "filename": manifest["filename"],
+            "total_size": manifest["total_size"],
+            "chunk_size": manifest["chunk_size"],
+            "total_chunks": manifest["total_chunks"],
+            "received": received,
+            "missing": missing,
+            "complete": not missing,
+            "chunks": chunks,
+        }
+
+    def discard(self, upload_id):
+        shutil.rmtree(self._session_dir(upload_id), ignore_errors=True)
+
+    def purge_expired(self):
+        cutoff = time.time() - self.ttl
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if _UPLOAD_ID.fullmatch(name) and os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+
+    # -------------------------------------------------
+    # CHUNKS
+    # -------------------------------------------------
+    @staticmethod
+    def expected_size(manifest, index):
+        if not 0 <= index < manifest["total_chunks"]:
+            raise ChunkRejected(f"chunk index must be between 0 and {manifest['total_chunks'] - 1}")
+        if index < manifest["total_chunks"] - 1:
+            return manifest["chunk_size"]
+        return manifest["total_size"] - manifest["chunk_size"] * index
+
+    async def receive_chunk(self, upload_id, index, body, sha256=None):
+        """
+        Stream one chunk from the async byte iterator `body`. The chunk is
+        rejected as soon as it runs past its expected size, and when its
+        size or `sha256` do not match. Re-sending a chunk replaces it.
+        """
+        manifest = self.manifest(upload_id)
+        expected = self.expected_size(manifest, index)
+        path = self._session_dir(upload_id)
+        final_path = os.path.join(path, f"{index}.chunk")
+        tmp_path = f"{final_path}.{uuid.uuid4().hex}.tmp"
+
+        digest = hashlib.sha256()
+        size = 0
+        f = await asyncio.to_thread(open, tmp_path, "wb")
+        try:
+            async for data in body:
+                size += len(data)
+                if size > expected:
+                    raise ChunkRejected(f"chunk {index} is larger than {expected} bytes")
+                await asyncio.to_thread(write_and_hash, f, digest, data)
+            f.close()
+            if size != expected:
+                raise ChunkRejected(f"chunk {index} has {size} bytes, expected {expected}")
+            if sha256 and digest.hexdigest() != sha256.lower():
+                raise ChecksumMismatch(f"chunk {index} failed its SHA-256 check")
+            digest_path = os.path.join(path, f"{index}.sha256")
+            digest_tmp = f"{digest_path}.{uuid.uuid4().hex}.tmp"
+            with open(digest_tmp, "w") as d:
+                json.dump({"sha256": digest.hexdigest(), "verified": bool(sha256)}, d)
+            os.replace(digest_tmp, digest_path)
+            os.replace(tmp_path, final_path)
+        except BaseException:
+            f.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        # Keeps an active session from being purged
+        os.utime(path)
+        return {"index": index, "size": size, "sha256": digest.hexdigest()}
+
+    def assemble(self, upload_id, dest_path):
+        """
+        Concatenate all chunks into `dest_path` and return (sha256, size).
+        Raises IncompleteUpload when chunks are missing and ChecksumMismatch
+        when a declared whole-file SHA-256 does not match (dest is removed,
+        the session and its chunks are kept).
+        """
+        status = self.status(upload_id)
+        if status["missing"]:
+            raise IncompleteUpload(f"{len(status['missing'])} chunks missing")
+        manifest = self.manifest(upload_id)
+        path = self._session_dir(upload_id)
+
+        digest = hashlib.sha256()
+        size = 0
+        with open(dest_path, "wb") as out:
+            for index in range(manifest["total_chunks"]):
+                with open(os.path.join(path, f"{index}.chunk"), "rb") as chunk:
+                    for data in iter(lambda: chunk.read(COPY_SIZE), b""):
+                        digest.update(data)
+                        out.write(data)
+                        size += len(data)
+
+        sha256 = digest.hexdigest()
+        if manifest["sha256"] and sha256 != manifest["sha256"]:
+            os.remove(dest_path)
+            raise ChecksumMismatch("assembled file does not match the declared SHA-256")
+        return sha256, size
+
+
+def write_and_hash(f, digest, data):
+    """Write `data` to `f` and add it to `digest` (run off the event loop)."""
+    digest.update(data)
+    f.write(data)
@@ -0,0 +1,233 @@
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    POOL_DTYPE = "string[pyarrow]"  # one contiguous buffer instead of a PyObject per value
+except ImportError:  # pragma: no cover - pyarrow is optional here
+    POOL_DTYPE = object
+
+
+# =====================================================
+# COMPACT IN-MEMORY CDR FRAME
+# =====================================================
+# Long-lived CDR tables are held column by column as plain numpy arrays:
+#
+#   numbers, SIM/device ids, locations, labels  -> int32 codes into a StringPool
+#   timestamp and other datetimes               -> int64 epoch nanoseconds
+#   duration                                    -> int32 seconds (nullable Int32 when decoded)
+#
+# Pools are shared by every column holding the same kind of value (caller
+# and receiver both use the "number" pool), and by every upload appended to
+# the frame, so each distinct string is stored once and codes are comparable
+# across columns. to_frame() decodes into categoricals over the pool, which
+# keeps the materialized DataFrame compact too. Missing values survive the
+# round trip: -1 codes, NaT, a duration sentinel, and NaN once a plain
+# integer column has gaps (it is widened to float64, as pandas would).
+
+NAT = np.iinfo(np.int64).min  # the int64 pattern of NaT
+DURATION_NA = np.iinfo(np.int32).min  # missing duration; real ones are clipped at 0
+
+# Column -> pool name. Other text columns get a pool of their own.
+POOL_FOR_COLUMN = {
+    "caller": "number", "receiver": "number",
+    "msisdn": "number", "other_party": "number", "callee": "number",
+    "caller_id": "number", "receiver_id": "number",
+    "imsi": "imsi", "sim_id": "imsi",
+    "imei": "imei", "device_id": "imei",
+    "cell_tower": "location", "location_origin": "location", "location_dest": "location",
+    "country_origin": "country", "country_dest": "country", "country": "country",
+}
+
+
+class StringPool:
+    """Append-only dictionary of distinct strings; a value's code never changes."""
+
+    def __init__(self):
+        self.values = pd.Index([], dtype=POOL_DTYPE)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.values)
+
+    def encode(self, values: pd.Series) -> np.ndarray:
+        """int32 codes for `values`; missing values are -1. Unseen values are added."""
+        codes, uniques = pd.factorize(values)
+        if len(uniques) == 0:
+            return np.full(len(values), -1, dtype=np.int32)
+        uniques = pd.Index(np.asarray(uniques).astype(str), dtype=POOL_DTYPE)
+        with self._lock:
+            positions = self.values.get_indexer(uniques)
+            new = positions < 0
+            if new.any():
+                positions[new] = np.arange(len(self.values), len(self.values) + new.sum())
+                self.values = self.values.append(uniques[new])
+        result = positions.astype(np.int32)[codes]
+        result[codes < 0] = -1
+        return result
+
+    def decode(self, codes: np.ndarray) -> pd.Categorical:
+        return pd.Categorical.from_codes(codes, categories=self.values, validate=False)
+
+
+class CompactCDRFrame:
+    def __init__(self, pools=None):
+        self.pools = pools if pools is not None else {}
+        self._columns = {}   # name -> numpy array
+        self._pooled = {}    # name -> pool name, for dictionary-encoded columns
+        self._epochs = set()  # datetime columns held as int64 nanoseconds
+        self._length = 0
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, pools=None):
+        return cls(pools).append(df)
+
+    # -------------------------------------------------
+    # COLUMN API
+    # -------------------------------------------------
+    def __len__(self):
+        return self._length
+
+    @property
+    def empty(self):
+        return self._length == 0
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    def __contains__(self, name):
+        return name in self._columns
+
+    def __getitem__(self, name) -> pd.Series:
+        return pd.Series(self._decode(name), name=name)
+
+    def codes(self, name) -> np.ndarray:
+        """Raw int32 dictionary codes of a pooled column, for integer-keyed group-bys."""
+        if name not in self._pooled:
+            raise KeyError(f"{name} is not a dictionary-encoded column")
+        return self._columns[name]
+
+    def pool_for(self, name) -> StringPool:
+        return self.pools[self._pooled[name]]
+
+    def to_frame(self, columns=None) -> pd.DataFrame:
+        """DataFrame view of `columns` (all by default); text columns are categoricals."""
+        columns = self.columns if columns is None else [c for c in columns if c in self._columns]
+        return pd.DataFrame({name: self._decode(name) for name in columns})
+
+    def iter_frames(self, chunk_rows, columns=None, start=0):
+        """
+        DataFrames of at most `chunk_rows` consecutive rows from row `start`
+        on, decoded like to_frame(); only one slice is materialized at a time.
+        """
+        columns = self.columns if columns is None else [c for c in columns if c in self._columns]
+        for first in range(start, self._length, chunk_rows):
+            rows = slice(first, first + chunk_rows)
+            yield pd.DataFrame({name: self._decode(name, rows) for name in columns})
+
+    def memory_usage(self) -> int:
+        """Bytes held by the column arrays plus the pools they use."""
+        arrays = sum(values.nbytes for values in self._columns.values())
+        pools = sum(
+            self.pools[pool].values.memory_usage(deep=True) for pool in set(self._pooled.values())
+        )
+        return arrays + pools
+
+    def fingerprint(self) -> str:
+        """Content hash of the frame; equal data appended in equal order hashes equal."""
+        digest = hashlib.sha256("|".join(self._columns).encode())
+        for name, values in self._columns.items():
+            digest.update(np.ascontiguousarray(values).tobytes())
+        for pool in sorted(set(self._pooled.values())):
+            digest.update(pd.util.hash_pandas_object(self.pools[pool].values, index=False).values.tobytes())
+        return digest.hexdigest()
+
+    # -------------------------------------------------
+    # WRITE
+    # -------------------------------------------------
+    def append(self, df: pd.DataFrame):
+        """Encode `df` with the shared pools and append it. Returns self."""
+        rows = len(df)
+        encoded = {str(column): self._encode(str(column), df[column]) for column in df.columns}
+        for name in list(self._columns) + [c for c in encoded if c not in self._columns]:
+            old = self._columns.get(name)
+            new = encoded.get(name)
+            if old is None:
+                old = self._missing(name, self._length, like=new)
+            if new is None:
+                new = self._missing(name, rows, like=old)
+            dtype = self._common_dtype(name, old, new)
+            self._columns[name] = np.concatenate([old.astype(dtype, copy=False), new.astype(dtype, copy=False)])
+        self._length += rows
+        return self
+
+    def with_rows(self, df: pd.DataFrame):
+        """
+        New frame holding this frame's rows followed by `df`; this frame is not
+        changed, so readers holding it keep a consistent view. Pools are shared.
+        """
+        frame = CompactCDRFrame(self.pools)
+        frame._columns = dict(self._columns)
+        frame._pooled = dict(self._pooled)
+        frame._epochs = set(self._epochs)
+        frame._length = self._length
+        return frame.append(df)
+
+    def _encode(self, name, values: pd.Series) -> np.ndarray:
+        if name == "timestamp" or pd.api.types.is_datetime64_any_dtype(values.dtype):
+            self._epochs.add(name)
+            stamps = pd.to_datetime(values, errors="coerce")
+            if getattr(stamps.dt, "tz", None) is not None:
+                stamps = stamps.dt.tz_localize(None)
+            return stamps.astype("datetime64[ns]").to_numpy().view(np.int64)
+        if name == "duration":
+            seconds = pd.to_numeric(values, errors="coerce").astype("float64").round()
+            missing = seconds.isna().to_numpy()
+            encoded = seconds.fillna(0).clip(0, np.iinfo(np.int32).max).to_numpy(dtype=np.int32)
+            encoded[missing] = DURATION_NA
+            return encoded
+        if (
+            isinstance(values.dtype, pd.CategoricalDtype)
+            or pd.api.types.is_object_dtype(values.dtype)
+            or pd.api.types.is_string_dtype(values.dtype)
+            or name in POOL_FOR_COLUMN
+            or name in self._pooled
+        ):
+            pool = self._pooled.setdefault(name, POOL_FOR_COLUMN.get(name, name))
+            return self.pools.setdefault(pool, StringPool()).encode(values)
+        if pd.api.types.is_bool_dtype(values.dtype):
+            return values.fillna(False).to_numpy(dtype=bool)
+        return values.to_numpy()
+
+    def _missing(self, name, rows, like):
+        if name in self._pooled:
+            return np.full(rows, -1, dtype=np.int32)
+        if name in self._epochs:
+            return np.full(rows, NAT, dtype=np.int64)
+        if name == "duration":
+            return np.full(rows, DURATION_NA, dtype=np.int32)
+        if like.dtype.kind == "f":
+            return np.full(rows, np.nan, dtype=like.dtype)
+        if like.dtype.kind in "iu":
+            return np.full(rows, np.nan)  # widens the column to float64
+        return np.full(rows, None, dtype=object)
+
+    def _common_dtype(self, name, old, new):
+        if name in self._pooled or name in self._epochs or name == "duration":
+            return old.dtype
+        # e.g. an int column meeting a chunk with NaN becomes float64, never a cast of NaN to int
+        return np.result_type(old.dtype, new.dtype)
+
+    def _decode(self, name, rows=slice(None)):
+        values = self._columns[name][rows]
+        if name in self._pooled:
+            return self.pool_for(name).decode(values)
+        if name in self._epochs:
+            return values.view("datetime64[ns]")
+        if name == "duration":
+            return pd.arrays.IntegerArray(values, values == DURATION_NA)
+        return values
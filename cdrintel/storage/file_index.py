@@ -0,0 +1,128 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+# =====================================================
+# PERSISTENT FILE INDEX
+# =====================================================
+# file_id -> metadata for stored evidence, kept in a SQLite database in WAL
+# mode so readers never block the writer and entries survive restarts.
+# Opening the index costs nothing: the connection is made on first use and
+# rows are read on demand, with an LRU cache in front of lookups by file_id.
+#
+# Rows are indexed by sha256 and by case_id for the secondary lookups.
+
+DEFAULT_PATH = os.environ.get("CDR_FILE_INDEX", "file_index.db")
+CACHE_SIZE = 4096
+
+FIELDS = ("file_id", "path", "content_type", "sha256", "case_id", "size", "created_at")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    file_id      TEXT PRIMARY KEY,
+    path         TEXT NOT NULL,
+    content_type TEXT,
+    sha256       TEXT NOT NULL,
+    case_id      TEXT,
+    size         INTEGER,
+    created_at   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_files_sha256 ON files (sha256);
+CREATE INDEX IF NOT EXISTS ix_files_case ON files (case_id, created_at);
+"""
+
+
+class FileIndex:
+    def __init__(self, path=DEFAULT_PATH, cache_size=CACHE_SIZE):
+        self.path = str(path)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # file_id -> metadata, most recent last
+        self._lock = threading.Lock()
+        self._local = threading.local()  # one connection per thread
+        self._schema_ready = False
+
+    # -------------------------------------------------
+    # CONNECTION
+    # -------------------------------------------------
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if not self._schema_ready:
+                conn.executescript(SCHEMA)
+                self._schema_ready = True
+            self._local.conn = conn
+        return conn
+
+    # -------------------------------------------------
+    # LRU CACHE
+    # -------------------------------------------------
+    def _cache_get(self, file_id):
+        with self._lock:
+            meta = self._cache.get(file_id)
+            if meta is not None:
+                self._cache.move_to_end(file_id)
+            return meta
+
+    def _cache_put(self, meta):
+        with self._lock:
+            self._cache[meta["file_id"]] = meta
+            self._cache.move_to_end(meta["file_id"])
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    # -------------------------------------------------
+    # API
+    # -------------------------------------------------
+    def add(self, file_id, path, sha256, content_type=None, case_id=None, size=None):
+        meta = {
+            "file_id": file_id, "path": str(path), "content_type": content_type,
+            "sha256": sha256, "case_id": case_id, "size": size, "created_at": time.time(),
+        }
+        self._connect().execute(
+            f"INSERT OR REPLACE INTO files ({', '.join(FIELDS)}) "
+            f"VALUES ({', '.join('?' * len(FIELDS))})",
+            [meta[field] for field in FIELDS],
+        )
+        self._cache_put(meta)
+        return meta
+
+    def get(self, file_id):
+        """Metadata dict for `file_id`, or None."""
+        meta = self._cache_get(file_id)
+        if meta is None:
+            row = self._connect().execute("SELECT * FROM files WHERE file_id = ?", (file_id,)).fetchone()
+            if row is None:
+                return None
+            meta = dict(row)
+            self._cache_put(meta)
+        return meta
+
+    def __contains__(self, file_id):
+        return self.get(file_id) is not None
+
+    def by_hash(self, sha256):
+        rows = self._connect().execute(
+            "SELECT * FROM files WHERE sha256 = ? ORDER BY created_at", (sha256.lower(),)
+        )
+        return [dict(row) for row in rows]
+
+    def by_case(self, case_id):
+        rows = self._connect().execute(
+            "SELECT * FROM files WHERE case_id = ? ORDER BY created_at", (case_id,)
+        )
+        return [dict(row) for row in rows]
+
+    def remove(self, file_id):
+        self._connect().execute("DELETE FROM files WHERE file_id = ?", (file_id,))
+        with self._lock:
+            self._cache.pop(file_id, None)
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM files").fetchone()[0]
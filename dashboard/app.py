@@ -2,9 +2,14 @@
 # IMPORTS
 # =====================================================
 import os
+import sys
 import io
 import base64
 import hashlib
+import logging
+import threading
+from collections import OrderedDict, namedtuple
+import numpy as np
 import pandas as pd
 from flask import Flask, redirect, request
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
@@ -13,9 +18,24 @@ from dash import html, dcc, dash_table
 import dash_bootstrap_components as dbc
 from dash.dependencies import Input, Output, State
 import plotly.express as px
-import plotly.graph_objects as go
-import networkx as nx
-from sklearn.ensemble import IsolationForest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from cdrintel.storage.case_store import CaseStore, conform_frame
+from cdrintel.storage.compact_frame import CompactCDRFrame
+from cdrintel.analytics.anomaly_model import AnomalyScorer, INPUT_COLUMNS as MODEL_COLUMNS
+from cdrintel.ingestion.scheduler import run_tasks
+from cdrintel.ingestion.csv_reader import read_cdr_csv
+from query_layer import CDRQueryIndex
+from network_graph import aggregate_edges, anomalous_callers, prune_edges, network_figure
+
+logger = logging.getLogger(__name__)
+
+# All dashboard data lives in one case of the columnar store
+CASE_ID = "dashboard"
+case_store = CaseStore(os.path.join(os.getcwd(), "case_store"))
+anomaly_scorer = AnomalyScorer(os.path.join(os.getcwd(), "anomaly_models"))
 
 # =====================================================
 # FLASK SERVER
@@ -76,14 +96,24 @@ def logout():
 # =====================================================
 # HELPERS
 # =====================================================
+COLUMN_ALIASES = {
+    "caller": ("calling_number", "caller_id"),
+    "receiver": ("called_number", "receiver_id"),
+    "duration": ("duration_sec",),
+    "timestamp": ("start_time",),
+}
+
 def normalize_columns(df):
     df.columns = [c.lower().strip() for c in df.columns]
 
-    if "caller" not in df.columns and "calling_number" in df.columns:
-        df["caller"] = df["calling_number"]
-
-    if "receiver" not in df.columns and "called_number" in df.columns:
-        df["receiver"] = df["called_number"]
+    renames = {}
+    for column, aliases in COLUMN_ALIASES.items():
+        if column in df.columns:
+            continue
+        alias = next((alias for alias in aliases if alias in df.columns), None)
+        if alias is not None:
+            renames[alias] = column
+    df = df.rename(columns=renames)
 
     if "duration" not in df.columns:
         df["duration"] = 0
@@ -98,40 +128,56 @@ def normalize_columns(df):
 # =====================================================
 # CDR INGESTION
 # =====================================================
+def read_cdr_file(path):
+    if path.endswith(".csv"):
+        df = read_cdr_csv(path)
+    elif path.endswith((".xlsx", ".xls")):
+        df = pd.read_excel(path)
+    else:
+        return None
+    return normalize_columns(df)
+
 def ingest_cdr_files(folder="cdr_files"):
+    """
+    Convert files in `folder` that are new or changed into the case store,
+    then load the case. Files already in the store are not parsed again;
+    new ones are parsed across a worker pool.
+    """
     folder_path = os.path.join(os.getcwd(), folder)
     if not os.path.exists(folder_path):
         os.makedirs(folder_path)
-        return pd.DataFrame()
-    
-    dfs = []
-    for f in os.listdir(folder_path):
-        path = os.path.join(folder_path, f)
-        try:
-            if f.endswith(".csv"):
-                df = pd.read_csv(path)
-            elif f.endswith((".xlsx", ".xls")):
-                df = pd.read_excel(path)
-            else:
-                continue
-            df = normalize_columns(df)
-            dfs.append(df)
-        except Exception as e:
-            print("Error reading", f, e)
-    
-    if not dfs:
-        return pd.DataFrame()
-    
-    return pd.concat(dfs, ignore_index=True)
+
+    new_files = [
+        os.path.join(folder_path, f) for f in os.listdir(folder_path)
+        if not case_store.is_ingested(os.path.join(folder_path, f), CASE_ID)
+    ]
+    # Parse new files in parallel; the store is only written from this process
+    for path, df, error in run_tasks(read_cdr_file, new_files):
+        if error is not None:
+            logger.warning("Error reading %s: %s", os.path.basename(path), error)
+        elif df is not None:
+            case_store.append(df, CASE_ID, source=path)
+
+    return case_store.scan(CASE_ID)
 
 # =====================================================
 # ANALYTICS ENGINE
 # =====================================================
-def analyze_cdr(df):
+def anomaly_insights(anomalies):
+    def column(name):
+        if name in anomalies.columns:
+            return anomalies[name].astype(str)
+        return pd.Series("None", index=anomalies.index)
+    texts = "⚠️ Anomalous call: " + column("caller") + " → " + column("receiver") + " (" + column("duration") + " sec)"
+    return texts.tolist()
+
+def analyze_cdr(df, anomaly_scores):
     result = {
         "summary": {},
         "insights": [],
         "network_graph": None,
+        "call_edges": None,
+        "flagged_callers": set(),
         "timeline": None,
         "geo_map": None,
         "anomalies": pd.DataFrame()
@@ -151,51 +197,19 @@ def analyze_cdr(df):
         for caller, count in top_callers.items():
             result["insights"].append(f"Top caller: {caller} with {count} calls")
 
-    # Anomaly detection
-    clf = IsolationForest(contamination=0.05, random_state=42)
-    df["duration_norm"] = df["duration"].fillna(0).values.reshape(-1, 1)
-    df["anomaly_score"] = clf.fit_predict(df[["duration_norm"]])
+    # Anomaly detection (scores come from the persisted AnomalyScorer)
+    df = df.assign(anomaly_score=anomaly_scores)
     anomalies = df[df["anomaly_score"] == -1]
     result["anomalies"] = anomalies
-    for _, row in anomalies.iterrows():
-        result["insights"].append(
-            f"⚠️ Anomalous call: {row.get('caller')} → {row.get('receiver')} ({row.get('duration')} sec)"
-        )
+    result["insights"].extend(anomaly_insights(anomalies))
 
     # Network graph
     if "caller" in df.columns and "receiver" in df.columns:
-        G = nx.from_pandas_edgelist(
-            df,
-            source="caller",
-            target="receiver",
-            edge_attr="duration",
-            create_using=nx.DiGraph()
+        result["call_edges"] = aggregate_edges(df)
+        result["flagged_callers"] = anomalous_callers(df)
+        result["network_graph"] = network_figure(
+            prune_edges(result["call_edges"]), result["flagged_callers"]
         )
-        pos = nx.spring_layout(G, k=0.5)
-        edge_x, edge_y = [], []
-        for u, v in G.edges():
-            x0, y0 = pos[u]; x1, y1 = pos[v]
-            edge_x.extend([x0, x1, None])
-            edge_y.extend([y0, y1, None])
-        edge_trace = go.Scatter(
-            x=edge_x, y=edge_y, line=dict(width=1, color='#888'),
-            hoverinfo='none', mode='lines'
-        )
-
-        node_x, node_y, node_text, node_color = [], [], [], []
-        for node in G.nodes():
-            x, y = pos[node]
-            node_x.append(x); node_y.append(y); node_text.append(node)
-            node_color.append(
-                'red' if df[df['caller'] == node]['anomaly_score'].sum() < 0 else 'blue'
-            )
-        node_trace = go.Scatter(
-            x=node_x, y=node_y, mode='markers+text', text=node_text,
-            hoverinfo='text', marker=dict(size=20, color=node_color)
-        )
-        network_fig = go.Figure(data=[edge_trace, node_trace])
-        network_fig.update_layout(title="Call Network Graph", showlegend=False)
-        result["network_graph"] = network_fig
 
     # Timeline
     if "timestamp" in df.columns and not df["timestamp"].isnull().all():
@@ -213,11 +227,57 @@ def analyze_cdr(df):
 
     return result
 
+# =====================================================
+# ANALYSIS CACHE
+# =====================================================
+# Analysis results are keyed by a content fingerprint of the dataset, so the
+# expensive pass runs once per dataset version instead of once per callback.
+ANALYSIS_CACHE_SIZE = 4
+analysis_cache = OrderedDict()
+analysis_lock = threading.Lock()
+
+# The dataset is published as one immutable snapshot: the frame, its
+# fingerprint and its anomaly scores always belong together. Uploads build a
+# new snapshot and swap it in; callbacks read the `dataset` global once and
+# use only that snapshot.
+Dataset = namedtuple("Dataset", ["frame", "version", "scores"])
+upload_lock = threading.Lock()  # uploads build on the previous snapshot, one at a time
+
+def cached_analysis(data):
+    with analysis_lock:
+        if data.version in analysis_cache:
+            analysis_cache.move_to_end(data.version)
+            return analysis_cache[data.version]
+        result = analyze_cdr(data.frame.to_frame(), data.scores)
+        analysis_cache[data.version] = result
+        if len(analysis_cache) > ANALYSIS_CACHE_SIZE:
+            analysis_cache.popitem(last=False)
+        return result
+
+def publish(data):
+    global dataset
+    with analysis_lock:
+        dataset = data
+
 # =====================================================
 # LOAD INITIAL DATA
 # =====================================================
-cdr_df = ingest_cdr_files()
-intel = analyze_cdr(cdr_df)
+# Records are held dictionary-encoded; DataFrames are materialized per use,
+# with only the columns that use needs
+cdr_frame = CompactCDRFrame.from_frame(ingest_cdr_files())
+cdr_version = cdr_frame.fingerprint()
+# The model is fitted once and reloaded from disk on restart, even after uploads
+model_input = cdr_frame.to_frame(MODEL_COLUMNS)
+if not cdr_frame.empty:
+    anomaly_scorer.ensure(model_input, cdr_version)
+dataset = Dataset(cdr_frame, cdr_version, anomaly_scorer.score(model_input))
+del model_input
+intel = cached_analysis(dataset)
+cdr_index = CDRQueryIndex(cdr_frame)
+
+PAGE_SIZE = 10
+REPORT_CHUNK_ROWS = 100_000
+first_page, first_total = cdr_index.page(0, PAGE_SIZE)
 
 # =====================================================
 # DASH APP
@@ -242,17 +302,22 @@ app.layout = dbc.Container([
         dbc.Col(dcc.Input(id="filter-receiver", placeholder="Filter by Receiver", type="text"), width=3),
         dbc.Col(dcc.DatePickerRange(
             id="filter-date",
-            start_date=cdr_df["timestamp"].min() if not cdr_df.empty else None,
-            end_date=cdr_df["timestamp"].max() if not cdr_df.empty else None
+            start_date=cdr_frame["timestamp"].min() if not cdr_frame.empty else None,
+            end_date=cdr_frame["timestamp"].max() if not cdr_frame.empty else None
         ), width=6)
     ], className="mb-3"),
+    # Paging, sorting and filtering run server side against cdr_index
     dash_table.DataTable(
         id="cdr-table",
-        data=cdr_df.to_dict("records"),
-        columns=[{"name": i, "id": i} for i in cdr_df.columns],
-        page_size=10, filter_action="native", sort_action="native",
+        data=first_page,
+        columns=[{"name": i, "id": i} for i in cdr_index.columns],
+        page_current=0, page_size=PAGE_SIZE, page_count=max(1, -(-first_total // PAGE_SIZE)),
+        page_action="custom", filter_action="custom", filter_query="",
+        sort_action="custom", sort_mode="multi", sort_by=[],
         style_table={"overflowX": "auto"},
     ),
+    html.Div(id="cdr-table-count", children=f"{first_total} records"),
+    dcc.Store(id="dataset-version", data=cdr_version),
     html.Hr(),
     html.H3("⏱ Call Timeline"),
     dcc.Graph(id="timeline-graph", figure=intel["timeline"] if intel["timeline"] else {}),
@@ -281,53 +346,118 @@ app.layout = dbc.Container([
 # DASH CALLBACKS
 # =====================================================
 @app.callback(
-    Output("cdr-table", "data"),
-    Output("timeline-graph", "figure"),
-    Output("geo-map", "figure"),
-    Output("network-graph", "figure"),
-    Input("filter-caller", "value"),
-    Input("filter-receiver", "value"),
-    Input("filter-date", "start_date"),
-    Input("filter-date", "end_date"),
+    Output("dataset-version", "data"),
     Input("upload-cdr", "contents"),
-    State("upload-cdr", "filename")
+    State("upload-cdr", "filename"),
+    prevent_initial_call=True
 )
-def update_dashboard(caller, receiver, start_date, end_date, uploaded_contents, filenames):
-    global cdr_df
+def handle_upload(uploaded_contents, filenames):
+    if uploaded_contents is None:
+        return dash.no_update
 
-    # Handle file upload
-    if uploaded_contents is not None:
+    with upload_lock:
         os.makedirs("cdr_files", exist_ok=True)
+        new_frames = []
+        replaced = False
         for content, name in zip(uploaded_contents, filenames):
             content_type, content_string = content.split(',')
             decoded_bytes = base64.b64decode(content_string)
-            with open(f"cdr_files/{name}", "wb") as f:
+            path = f"cdr_files/{name}"
+            with open(path, "wb") as f:
                 f.write(decoded_bytes)
-            data = io.BytesIO(decoded_bytes)
-            if name.endswith(".csv"):
-                df_new = pd.read_csv(data)
-            elif name.endswith((".xlsx", ".xls")):
-                df_new = pd.read_excel(data)
-            else:
+            if case_store.is_ingested(path, CASE_ID):
+                continue  # same content as an earlier upload
+            df_new = read_cdr_file(path)
+            if df_new is None:
                 continue
-            df_new = normalize_columns(df_new)
-            cdr_df = pd.concat([cdr_df, df_new], ignore_index=True)
-        print("CDR records loaded:", len(cdr_df))
-
-    intel_updated = analyze_cdr(cdr_df)
-
-    df_filtered = cdr_df.copy()
-    if caller: df_filtered = df_filtered[df_filtered["caller"].str.contains(caller, case=False, na=False)]
-    if receiver: df_filtered = df_filtered[df_filtered["receiver"].str.contains(receiver, case=False, na=False)]
-    if start_date: df_filtered = df_filtered[df_filtered["timestamp"] >= pd.to_datetime(start_date)]
-    if end_date: df_filtered = df_filtered[df_filtered["timestamp"] <= pd.to_datetime(end_date)]
+            replaced = replaced or case_store.is_recorded(path)
+            df_new = conform_frame(df_new)
+            case_store.append(df_new, CASE_ID, source=path)
+            new_frames.append(df_new)
+        if not new_frames:
+            return dash.no_update
+
+        # Build the next snapshot in locals; readers keep using the current one
+        current = dataset
+        if replaced:
+            # A changed file replaced its earlier rows in the store; reload the case
+            frame = CompactCDRFrame.from_frame(case_store.scan(CASE_ID))
+            version = frame.fingerprint()
+            model_input = frame.to_frame(MODEL_COLUMNS)
+            anomaly_scorer.ensure(model_input, version)
+            scores = anomaly_scorer.score(model_input)
+            cdr_index.load(frame)
+        else:
+            df_new = pd.concat(new_frames, ignore_index=True)
+            frame = current.frame.with_rows(df_new)
+            version = frame.fingerprint()
+            # Score only the new rows with the fitted model; fan-out uses the full history
+            if anomaly_scorer.model is None:
+                model_input = frame.to_frame(MODEL_COLUMNS)
+                anomaly_scorer.ensure(model_input, version)
+                scores = anomaly_scorer.score(model_input)
+            else:
+                context = frame.to_frame(["caller", "receiver"])
+                scores = np.concatenate([current.scores, anomaly_scorer.score(df_new, context=context)])
+            # Only the new rows go into the table index
+            cdr_index.append(frame, start=len(current.frame))
+        publish(Dataset(frame, version, scores))
+    logger.info("CDR records loaded: %d", len(frame))
+    return version
 
+@app.callback(
+    Output("timeline-graph", "figure"),
+    Output("geo-map", "figure"),
+    Input("dataset-version", "data"),
+    prevent_initial_call=True
+)
+def update_figures(version):
+    # Only a new dataset version re-runs the analysis; filters never do
+    intel_updated = cached_analysis(dataset)
     return (
-        df_filtered.to_dict("records"),
         intel_updated["timeline"] if intel_updated["timeline"] else {},
-        intel_updated["geo_map"] if intel_updated["geo_map"] else {},
-        intel_updated["network_graph"] if intel_updated["network_graph"] else {}
+        intel_updated["geo_map"] if intel_updated["geo_map"] else {}
+    )
+
+@app.callback(
+    Output("network-graph", "figure"),
+    Input("dataset-version", "data"),
+    Input("filter-caller", "value"),
+    prevent_initial_call=True
+)
+def update_network(version, caller):
+    intel_updated = cached_analysis(dataset)
+    edges = intel_updated["call_edges"]
+    # An exact caller match switches to that number's ego network
+    if caller and edges is not None and (edges["caller"] == caller).any():
+        fig = network_figure(
+            prune_edges(edges, focus=caller), intel_updated["flagged_callers"],
+            title=f"Call Network: {caller}"
+        )
+        return fig if fig else {}
+    return intel_updated["network_graph"] if intel_updated["network_graph"] else {}
+
+@app.callback(
+    Output("cdr-table", "data"),
+    Output("cdr-table", "page_count"),
+    Output("cdr-table-count", "children"),
+    Input("cdr-table", "page_current"),
+    Input("cdr-table", "page_size"),
+    Input("cdr-table", "sort_by"),
+    Input("cdr-table", "filter_query"),
+    Input("filter-caller", "value"),
+    Input("filter-receiver", "value"),
+    Input("filter-date", "start_date"),
+    Input("filter-date", "end_date"),
+    Input("dataset-version", "data")
+)
+def update_table(page_current, page_size, sort_by, filter_query, caller, receiver, start_date, end_date, _version):
+    records, total = cdr_index.page(
+        page_current or 0, page_size or PAGE_SIZE, sort_by, filter_query,
+        caller=caller, receiver=receiver, start=start_date, end=end_date
     )
+    page_count = max(1, -(-total // (page_size or PAGE_SIZE)))
+    return records, page_count, f"{total} records"
 
 @app.callback(
     Output("download-report", "data"),
@@ -336,7 +466,8 @@ def update_dashboard(caller, receiver, start_date, end_date, uploaded_contents,
 )
 def generate_report(n_clicks):
     buffer = io.StringIO()
-    cdr_df.to_csv(buffer, index=False)
+    for i, chunk in enumerate(dataset.frame.iter_frames(REPORT_CHUNK_ROWS)):
+        chunk.to_csv(buffer, index=False, header=i == 0)
     buffer.seek(0)
     return dcc.send_string(buffer.getvalue(), "cdr_evidence_report.csv")
 
@@ -0,0 +1,137 @@
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import networkx as nx
+import plotly.graph_objects as go
+
+# =====================================================
+# CALL NETWORK RENDERING
+# =====================================================
+# Calls are aggregated to one weighted edge per caller->receiver pair, pruned
+# to the busiest numbers (or to one number's ego network), laid out once per
+# graph fingerprint and drawn with WebGL traces.
+
+DEFAULT_TOP_K = 150        # hub numbers kept in the overview graph
+MAX_EDGES = 500            # strongest edges drawn around those hubs
+EGO_NEIGHBOURS = 100       # strongest contacts kept around a focus number
+LABEL_NODE_LIMIT = 60      # above this, labels are hover-only
+LAYOUT_CACHE_SIZE = 32
+
+_layout_cache = OrderedDict()
+_layout_lock = threading.Lock()
+
+
+def aggregate_edges(df):
+    """One row per caller->receiver pair with call count and total duration."""
+    data = df[["caller", "receiver"]].copy()
+    data["duration"] = pd.to_numeric(df["duration"], errors="coerce").fillna(0) if "duration" in df else 0
+    data = data.dropna(subset=["caller", "receiver"])
+    data["caller"] = data["caller"].astype(str)
+    data["receiver"] = data["receiver"].astype(str)
+    return (
+        data.groupby(["caller", "receiver"], sort=False)
+        .agg(calls=("duration", "size"), total_duration=("duration", "sum"))
+        .reset_index()
+    )
+
+
+def anomalous_callers(df):
+    """Callers whose anomaly scores sum below zero, in one grouped pass."""
+    if "anomaly_score" not in df.columns or "caller" not in df.columns:
+        return set()
+    scores = df.groupby(df["caller"].astype(str))["anomaly_score"].sum()
+    return set(scores.index[scores < 0])
+
+
+def _weighted_degree(edges):
+    return (
+        pd.concat([
+            edges[["caller", "calls"]].rename(columns={"caller": "node"}),
+            edges[["receiver", "calls"]].rename(columns={"receiver": "node"}),
+        ])
+        .groupby("node")["calls"].sum()
+    )
+
+
+def prune_edges(edges, top_k=DEFAULT_TOP_K, focus=None):
+    """
+    Keep the strongest MAX_EDGES edges touching the `top_k` nodes with the
+    highest weighted degree, or, when `focus` is given, that number plus its
+    strongest EGO_NEIGHBOURS contacts and the edges among them.
+    """
+    if edges.empty:
+        return edges
+    if focus is not None:
+        touching = edges[(edges["caller"] == focus) | (edges["receiver"] == focus)]
+        neighbours = pd.concat([
+            touching[["caller", "calls"]].rename(columns={"caller": "node"}),
+            touching[["receiver", "calls"]].rename(columns={"receiver": "node"}),
+        ])
+        neighbours = neighbours[neighbours["node"] != focus].groupby("node")["calls"].sum()
+        keep = set(neighbours.nlargest(EGO_NEIGHBOURS).index) | {focus}
+        return edges[edges["caller"].isin(keep) & edges["receiver"].isin(keep)]
+    hubs = set(_weighted_degree(edges).nlargest(top_k).index)
+    around_hubs = edges[edges["caller"].isin(hubs) | edges["receiver"].isin(hubs)]
+    return around_hubs.nlargest(MAX_EDGES, "calls")
+
+
+def graph_fingerprint(edges):
+    digest = hashlib.sha256()
+    if not edges.empty:
+        digest.update(pd.util.hash_pandas_object(edges[["caller", "receiver", "calls"]], index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+def cached_layout(edges):
+    """spring_layout of the pruned graph, memoized per graph fingerprint."""
+    key = graph_fingerprint(edges)
+    with _layout_lock:
+        if key in _layout_cache:
+            _layout_cache.move_to_end(key)
+            return _layout_cache[key]
+
+    G = nx.Graph()
+    G.add_weighted_edges_from(edges[["caller", "receiver", "calls"]].itertuples(index=False, name=None))
+    pos = nx.spring_layout(G, k=0.5, seed=42) if len(G) else {}
+
+    with _layout_lock:
+        _layout_cache[key] = pos
+        if len(_layout_cache) > LAYOUT_CACHE_SIZE:
+            _layout_cache.popitem(last=False)
+    return pos
+
+
+def network_figure(edges, flagged, title="Call Network Graph"):
+    pos = cached_layout(edges)
+    if not pos:
+        return None
+
+    nodes = list(pos)
+    coords = np.array([pos[n] for n in nodes])
+    index = {node: i for i, node in enumerate(nodes)}
+
+    # Edge segments as one array: x0, x1, NaN separator per edge
+    src = coords[edges["caller"].map(index).to_numpy()]
+    dst = coords[edges["receiver"].map(index).to_numpy()]
+    gap = np.full(len(edges), np.nan)
+    edge_x = np.column_stack([src[:, 0], dst[:, 0], gap]).ravel()
+    edge_y = np.column_stack([src[:, 1], dst[:, 1], gap]).ravel()
+    edge_trace = go.Scattergl(
+        x=edge_x, y=edge_y, line=dict(width=1, color='#888'),
+        hoverinfo='none', mode='lines'
+    )
+
+    degree = _weighted_degree(edges).reindex(nodes).fillna(0).to_numpy()
+    sizes = 8 + 22 * np.sqrt(degree / degree.max()) if degree.max() > 0 else 10
+    node_trace = go.Scattergl(
+        x=coords[:, 0], y=coords[:, 1],
+        mode='markers+text' if len(nodes) <= LABEL_NODE_LIMIT else 'markers',
+        text=nodes, hovertext=[f"{n} ({int(d)} calls)" for n, d in zip(nodes, degree)],
+        hoverinfo='text',
+        marker=dict(size=sizes, color=['red' if n in flagged else 'blue' for n in nodes])
+    )
+    fig = go.Figure(data=[edge_trace, node_trace])
+    fig.update_layout(title=title, showlegend=False)
+    return fig
@@ -0,0 +1,181 @@
+import sqlite3
+import threading
+import pandas as pd
+
+# =====================================================
+# INDEXED QUERY LAYER FOR THE CDR TABLE
+# =====================================================
+# The dashboard table runs with page_action/sort_action/filter_action="custom".
+# Records are loaded once into an in-memory SQLite table with indexes on the
+# columns investigators filter and sort by, and every table interaction is a
+# single LIMIT/OFFSET query, so only one page is sent to the browser.
+# Records are copied in from a CompactCDRFrame in row slices, and uploads
+# append only their new rows, so no full object-dtype copy is ever built.
+
+TABLE = "cdr"
+INDEXED_COLUMNS = ("caller", "receiver", "timestamp", "duration")
+LOAD_CHUNK_ROWS = 50_000
+
+# Operators of the DataTable filter_query syntax, as documented for custom filtering
+FILTER_OPERATORS = [
+    ("ge ", ">="), ("le ", "<="), ("lt ", "<"), ("gt ", ">"),
+    ("ne ", "!="), ("eq ", "="), ("contains ",), ("datestartswith ",),
+]
+SQL_OPERATORS = {
+    "ge": ">=", "le": "<=", "lt": "<", "gt": ">", "ne": "!=", "eq": "=",
+}
+
+
+def _quote(column):
+    return '"' + column.replace('"', '""') + '"'
+
+
+def split_filter_part(filter_part):
+    """Parse one `{column} op value` clause into (column, operator, value string)."""
+    for operator_type in FILTER_OPERATORS:
+        for operator in operator_type:
+            if operator in filter_part:
+                name_part, value_part = filter_part.split(operator, 1)
+                name = name_part[name_part.find("{") + 1: name_part.rfind("}")]
+
+                value_part = value_part.strip()
+                v0 = value_part[:1]
+                if v0 and v0 == value_part[-1] and v0 in ("'", '"', "`"):
+                    value = value_part[1:-1].replace("\\" + v0, v0)
+                else:
+                    # kept as text: numbers are only coerced for numeric
+                    # columns (see CDRQueryIndex._where), so phone numbers
+                    # and ids still match as typed
+                    value = value_part
+
+                # word operators need spaces after them in the filter string,
+                # but we don't want these later
+                return name, operator_type[0].strip(), value
+    return None, None, None
+
+
+def _chunks(data, start=0):
+    if hasattr(data, "iter_frames"):  # CompactCDRFrame
+        return data.iter_frames(LOAD_CHUNK_ROWS, start=start)
+    return [data.iloc[start:]]
+
+
+class CDRQueryIndex:
+    def __init__(self, df=None):
+        self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self._lock = threading.Lock()
+        self.columns = []
+        self.numeric_columns = set()
+        if df is not None:
+            self.load(df)
+
+    def load(self, data):
+        """Replace the indexed records with `data` (a DataFrame or CompactCDRFrame)."""
+        with self._lock:
+            self._conn.execute(f"DROP TABLE IF EXISTS {TABLE}")
+            self.columns = []
+            self.numeric_columns = set()
+            for chunk in _chunks(data):
+                self._insert(chunk)
+            for column in INDEXED_COLUMNS:
+                if column in self.columns:
+                    self._conn.execute(
+                        f"CREATE INDEX {_quote('ix_' + column)} ON {TABLE} ({_quote(column)})"
+                    )
+
+    def append(self, data, start=0):
+        """
+        Add the records of `data` (a DataFrame or CompactCDRFrame) from row
+        `start` on; existing rows are untouched and indexes are maintained.
+        """
+        with self._lock:
+            for chunk in _chunks(data, start):
+                self._insert(chunk)
+
+    def _insert(self, df):
+        # Called with the lock held
+        df = df.copy()
+        df.columns = [str(c) for c in df.columns]
+        for column in df.columns:
+            if pd.api.types.is_datetime64_any_dtype(df[column]):
+                # ISO text keeps chronological order under string comparison
+                df[column] = df[column].dt.strftime("%Y-%m-%d %H:%M:%S")
+            elif isinstance(df[column].dtype, pd.CategoricalDtype):
+                df[column] = df[column].astype(object)
+            elif pd.api.types.is_numeric_dtype(df[column]) and not pd.api.types.is_bool_dtype(df[column]):
+                if column not in self.columns:
+                    self.numeric_columns.add(column)
+        if self.columns:
+            for column in df.columns:
+                if column not in self.columns:
+                    self._conn.execute(f"ALTER TABLE {TABLE} ADD COLUMN {_quote(column)}")
+                    self.columns.append(column)
+        df.to_sql(TABLE, self._conn, index=False, if_exists="append")
+        if not self.columns:
+            self.columns = list(df.columns)
+
+    def _compare_value(self, column, value):
+        """Filter value as a number for numeric columns; text columns compare as typed."""
+        if column in self.numeric_columns:
+            try:
+                return float(value)
+            except ValueError:
+                pass
+        return value
+
+    def _where(self, filter_query, caller, receiver, start, end):
+        clauses, params = [], []
+
+        for part in (filter_query or "").split(" && "):
+            column, operator, value = split_filter_part(part)
+            if column not in self.columns:
+                continue
+            if operator in SQL_OPERATORS:
+                clauses.append(f"{_quote(column)} {SQL_OPERATORS[operator]} ?")
+                params.append(self._compare_value(column, value))
+            elif operator == "contains":
+                clauses.append(f"CAST({_quote(column)} AS TEXT) LIKE ?")
+                params.append(f"%{value}%")
+            elif operator == "datestartswith":
+                clauses.append(f"{_quote(column)} LIKE ?")
+                params.append(f"{value}%")
+
+        if caller and "caller" in self.columns:
+            clauses.append("CAST(caller AS TEXT) LIKE ?")
+            params.append(f"%{caller}%")
+        if receiver and "receiver" in self.columns:
+            clauses.append("CAST(receiver AS TEXT) LIKE ?")
+            params.append(f"%{receiver}%")
+        if start and "timestamp" in self.columns:
+            clauses.append("timestamp >= ?")
+            params.append(pd.Timestamp(start).strftime("%Y-%m-%d %H:%M:%S"))
+        if end and "timestamp" in self.columns:
+            clauses.append("timestamp <= ?")
+            params.append(pd.Timestamp(end).strftime("%Y-%m-%d %H:%M:%S"))
+
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    def page(self, page_current=0, page_size=10, sort_by=None, filter_query="",
+             caller=None, receiver=None, start=None, end=None):
+        """
+        Return (records, total_matching_rows) for one page of the table.
+        """
+        if not self.columns:
+            return [], 0
+
+        where, params = self._where(filter_query, caller, receiver, start, end)
+        order = [
+            f"{_quote(s['column_id'])} {'ASC' if s['direction'] == 'asc' else 'DESC'}"
+            for s in (sort_by or []) if s["column_id"] in self.columns
+        ]
+        order_by = f" ORDER BY {', '.join(order)}" if order else ""
+
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM {TABLE}{where}", params).fetchone()[0]
+            page = pd.read_sql_query(
+                f"SELECT * FROM {TABLE}{where}{order_by} LIMIT ? OFFSET ?",
+                self._conn,
+                params=params + [page_size, page_current * page_size],
+            )
+        return page.to_dict("records"), total
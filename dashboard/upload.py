@@ -1,6 +1,7 @@
 import base64
 import io
 import pandas as pd
+from cdrintel.ingestion.csv_reader import read_cdr_csv
 
 def parse_cdr(contents, filename):
     content_type, content_string = contents.split(',')
@@ -15,7 +16,7 @@ def parse_cdr(contents, filename):
     data = io.BytesIO(decoded)
 
     if filename.endswith(".csv"):
-        df = pd.read_csv(data)
+        df = read_cdr_csv(data)
     elif filename.endswith((".xlsx", ".xls")):
         df = pd.read_excel(data)
     else:
@@ -0,0 +1,41 @@
+import pandas as pd
+import pytest
+
+from app.analytics import ANALYSIS_MODES, analyze_cdr
+from app.ingestion.bulk_loader import bulk_load_cdr
+
+
+def tied_cdrs():
+    """14 callers, inserted in descending order; most share a call count."""
+    rows = []
+    for i in range(14):
+        caller = f"+2547{13 - i:08d}"
+        for k in range(5 if i >= 12 else 3):
+            rows.append({
+                "caller": caller,
+                "callee": "+254799000000",
+                "timestamp": pd.Timestamp("2025-01-01 10:00") + pd.Timedelta(minutes=k),
+                "duration": 4000 if k == 0 else 10,
+                "imsi": f"imsi{i % 3}",
+                "imei": f"imei{i % 4}",
+                "subscriber_id": f"sub{i}",
+            })
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture
+def results(engine, db):
+    bulk_load_cdr([tied_cdrs()], engine=engine)
+    return {mode: analyze_cdr(db, mode=mode) for mode in ANALYSIS_MODES}
+
+
+def test_top_callers_break_ties_by_caller(results):
+    expected = {"+254700000000": 5, "+254700000001": 5}
+    expected.update({f"+2547{i:08d}": 3 for i in range(2, 10)})
+    for mode in ANALYSIS_MODES:
+        assert results[mode]["top_callers"] == expected, mode
+        assert list(results[mode]["top_callers"]) == list(expected), mode
+
+
+def test_modes_return_equal_results(results):
+    assert results["pandas"] == results["sql"] == results["incremental"]
@@ -0,0 +1,34 @@
+from sqlalchemy import inspect, text
+
+from app.anomaly_store import store_anomalies, upgrade_analysis_log
+
+INTELLIGENCE = {
+    "top_callers": {"+254700000001": 5},
+    "long_calls": [{"caller": "+254700000001", "duration": 4000, "timestamp": "2025-01-01T10:00:00"}],
+}
+
+
+def test_rerunning_the_detectors_logs_nothing_new(db):
+    assert store_anomalies(db, INTELLIGENCE) == 2
+    assert store_anomalies(db, INTELLIGENCE) == 0
+
+
+def test_table_created_before_content_hash_is_upgraded(engine, db):
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE analysis_log"))
+        conn.execute(text(
+            "CREATE TABLE analysis_log (id INTEGER PRIMARY KEY, subscriber_id VARCHAR,"
+            " anomaly_type VARCHAR, details JSON, timestamp DATETIME)"
+        ))
+        conn.execute(text("INSERT INTO analysis_log (subscriber_id, anomaly_type) VALUES ('N/A', 'top_callers')"))
+
+    assert store_anomalies(db, INTELLIGENCE) == 2
+    assert store_anomalies(db, INTELLIGENCE) == 0
+
+    indexes = {index["name"]: index for index in inspect(engine).get_indexes("analysis_log")}
+    assert indexes["uq_analysis_log_content_hash"]["unique"]
+    assert "ix_analysis_log_type_timestamp" in indexes
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM analysis_log")).scalar() == 3
+
+    upgrade_analysis_log(engine)  # already current: no-op
@@ -0,0 +1,39 @@
+import pandas as pd
+import pytest
+from sqlalchemy import inspect
+
+from app.ingestion.bulk_loader import CDRBulkLoader, bulk_load_cdr
+
+
+def cdr_batch(rows, start=0):
+    return pd.DataFrame({
+        "caller": [f"+2547{i:08d}" for i in range(start, start + rows)],
+        "callee": ["+254799000000"] * rows,
+        "timestamp": pd.date_range("2025-01-01", periods=rows, freq="min"),
+        "duration": range(rows),
+    })
+
+
+def cdr_indexes(engine):
+    return sorted(index["name"] for index in inspect(engine).get_indexes("cdr"))
+
+
+def test_bulk_load_rebuilds_deferred_indexes(engine):
+    before = cdr_indexes(engine)
+    assert bulk_load_cdr([cdr_batch(10)], engine=engine, defer_indexes=True) == 10
+    assert cdr_indexes(engine) == before
+
+
+def test_aborted_load_keeps_rows_and_indexes_unchanged(engine):
+    bulk_load_cdr([cdr_batch(10)], engine=engine)
+    before = cdr_indexes(engine)
+    assert before
+
+    with pytest.raises(FileNotFoundError):
+        with CDRBulkLoader(engine=engine, defer_indexes=True) as loader:
+            loader.write(cdr_batch(5, start=10))
+            raise FileNotFoundError("missing.csv")
+
+    assert cdr_indexes(engine) == before
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT count(*) FROM cdr").scalar() == 10
@@ -0,0 +1,44 @@
+import os
+
+import pandas as pd
+
+from cdrintel.storage.case_store import CaseStore
+
+
+def write_source(path, callers):
+    pd.DataFrame({
+        "caller": callers,
+        "receiver": ["+254799000000"] * len(callers),
+        "timestamp": ["2025-01-01 10:00:00"] * len(callers),
+        "duration": [10] * len(callers),
+    }).to_csv(path, index=False)
+
+
+def ingest(store, path):
+    store.append(pd.read_csv(path, dtype={"caller": str, "receiver": str}), "case-1", source=str(path))
+
+
+def test_touched_source_is_not_ingested_again(tmp_path):
+    store = CaseStore(str(tmp_path / "store"))
+    source = tmp_path / "cdr.csv"
+    write_source(source, ["+254700000001", "+254700000002"])
+    ingest(store, source)
+
+    stat = os.stat(source)
+    os.utime(source, (stat.st_atime, stat.st_mtime + 60))
+
+    assert store.is_ingested(str(source), "case-1")
+    assert len(store.scan("case-1")) == 2
+
+
+def test_changed_source_replaces_its_rows(tmp_path):
+    store = CaseStore(str(tmp_path / "store"))
+    source = tmp_path / "cdr.csv"
+    write_source(source, ["+254700000001", "+254700000002"])
+    ingest(store, source)
+
+    write_source(source, ["+254700000003", "+254700000004", "+254700000005"])
+    assert not store.is_ingested(str(source), "case-1")
+    ingest(store, source)
+
+    assert sorted(store.scan("case-1")["caller"]) == ["+254700000003", "+254700000004", "+254700000005"]
@@ -0,0 +1,100 @@
+import asyncio
+import hashlib
+import os
+
+import pytest
+
+from cdrintel.storage.chunked_upload import (
+    MIN_CHUNK_SIZE, ChecksumMismatch, ChunkedUploadStore, ChunkRejected, IncompleteUpload,
+)
+
+DATA = bytes(range(256)) * 4 + b"tail"  # 1028 bytes: 4 chunks of 256 and one of 4
+CHUNK = 256
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ChunkedUploadStore(str(tmp_path / "sessions"), min_chunk_size=CHUNK)
+
+
+def chunk(index):
+    return DATA[index * CHUNK:(index + 1) * CHUNK]
+
+
+def send(store, upload_id, index, data=None, sha256=None):
+    async def body():
+        yield data if data is not None else chunk(index)
+    return asyncio.run(store.receive_chunk(upload_id, index, body(), sha256))
+
+
+def new_session(store, sha256=hashlib.sha256(DATA).hexdigest()):
+    return store.create("calls.csv", len(DATA), CHUNK, sha256)["upload_id"]
+
+
+def test_out_of_order_and_duplicate_chunks_assemble_in_order(store, tmp_path):
+    upload_id = new_session(store)
+    for index in (4, 2, 0, 2, 3, 1, 0):
+        send(store, upload_id, index)
+
+    dest = tmp_path / "assembled"
+    sha256, size = store.assemble(upload_id, str(dest))
+    assert (sha256, size) == (hashlib.sha256(DATA).hexdigest(), len(DATA))
+    assert dest.read_bytes() == DATA
+
+
+def test_status_lists_missing_chunks_to_resume(store, tmp_path):
+    upload_id = new_session(store)
+    send(store, upload_id, 0)
+    send(store, upload_id, 3, sha256=hashlib.sha256(chunk(3)).hexdigest())
+
+    status = store.status(upload_id)
+    assert (status["received"], status["missing"], status["complete"]) == ([0, 3], [1, 2, 4], False)
+    assert status["chunks"][1] == {"index": 3, "sha256": hashlib.sha256(chunk(3)).hexdigest(), "verified": True}
+    with pytest.raises(IncompleteUpload):
+        store.assemble(upload_id, str(tmp_path / "assembled"))
+
+    for index in status["missing"]:
+        send(store, upload_id, index)
+    assert store.status(upload_id)["complete"]
+    assert store.assemble(upload_id, str(tmp_path / "assembled"))[1] == len(DATA)
+
+
+def test_checksum_failure_keeps_the_session_and_reports_suspect_chunks(store, tmp_path):
+    upload_id = new_session(store)
+    for index in range(5):
+        if index == 1:
+            send(store, upload_id, 1, data=bytes(CHUNK))  # corrupted in transit
+        else:
+            send(store, upload_id, index, sha256=hashlib.sha256(chunk(index)).hexdigest())
+
+    dest = tmp_path / "assembled"
+    with pytest.raises(ChecksumMismatch):
+        store.assemble(upload_id, str(dest))
+    assert not dest.exists()
+    assert store.unverified_chunks(upload_id) == [1]
+
+    send(store, upload_id, 1, sha256=hashlib.sha256(chunk(1)).hexdigest())
+    assert store.assemble(upload_id, str(dest))[0] == hashlib.sha256(DATA).hexdigest()
+
+    store.discard(upload_id)
+    assert not os.path.exists(os.path.join(store.root, upload_id))
+
+
+def test_bad_chunks_are_rejected(store):
+    upload_id = new_session(store)
+    with pytest.raises(ChecksumMismatch):
+        send(store, upload_id, 0, sha256=hashlib.sha256(b"other").hexdigest())
+    with pytest.raises(ChunkRejected):
+        send(store, upload_id, 0, data=chunk(0) + b"x")
+    with pytest.raises(ChunkRejected):
+        send(store, upload_id, 5)
+    assert store.status(upload_id)["received"] == []
+
+
+def test_chunk_size_has_a_floor(tmp_path):
+    store = ChunkedUploadStore(str(tmp_path / "sessions"))
+    with pytest.raises(ChunkRejected):
+        store.create("calls.csv", 20 * 1024 ** 3, 1)
+    assert store.create("calls.csv", 20 * 1024 ** 3, MIN_CHUNK_SIZE)["total_chunks"] == 20 * 1024
+    # A file below the minimum is sent as a single chunk
+    assert store.create("calls.csv", 10, 10)["total_chunks"] == 1
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+from cdrintel.storage.compact_frame import CompactCDRFrame
+from dashboard.query_layer import CDRQueryIndex
+
+
+def test_missing_durations_stay_missing():
+    df = pd.DataFrame({"caller": ["a", "b", "c"], "duration": [10, None, 7.6]})
+    frame = CompactCDRFrame.from_frame(df)
+
+    decoded = frame.to_frame()
+    assert str(decoded["duration"].dtype) == "Int32"
+    assert decoded["duration"].tolist() == [10, pd.NA, 8]
+    assert decoded["duration"].mean() == 9
+    assert [chunk["duration"].tolist() for chunk in frame.iter_frames(2)] == [[10, pd.NA], [8]]
+
+
+def test_chunks_with_gaps_in_an_int_column_keep_nan():
+    frame = CompactCDRFrame.from_frame(pd.DataFrame({"caller": ["a"], "cell_count": [3]}))
+    frame.append(pd.DataFrame({"caller": ["b"], "cell_count": [np.nan]}))
+    frame.append(pd.DataFrame({"caller": ["c"]}))
+    frame.append(pd.DataFrame({"caller": ["d"], "cell_count": [5], "duration": [60]}))
+
+    decoded = frame.to_frame()
+    assert decoded["cell_count"].dtype == np.float64
+    assert decoded["cell_count"].tolist()[::3] == [3.0, 5.0]
+    assert decoded["cell_count"].iloc[1:3].isna().all()
+    assert decoded["duration"].tolist() == [pd.NA, pd.NA, pd.NA, 60]
+
+
+def test_missing_durations_are_null_in_the_query_index():
+    frame = CompactCDRFrame.from_frame(pd.DataFrame({"caller": ["a", "b"], "duration": [30, None]}))
+    records, total = CDRQueryIndex(frame).page(filter_query="{duration} ge 0")
+    assert total == 1 and records[0]["caller"] == "a"
@@ -0,0 +1,37 @@
+import hashlib
+
+from cdrintel.storage.file_index import FileIndex
+
+
+def digest(text):
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def test_entries_survive_reopening(tmp_path):
+    path = tmp_path / "files.db"
+    index = FileIndex(path)
+    index.add("f1", "blobs/a", digest("a"), content_type="text/csv", case_id="c1", size=10)
+    index.add("f2", "blobs/a", digest("a"), case_id="c2")
+    index.add("f3", "blobs/b", digest("b"), case_id="c1")
+
+    reopened = FileIndex(path)
+    assert len(reopened) == 3
+    assert reopened.get("f1")["size"] == 10
+    assert [meta["file_id"] for meta in reopened.by_hash(digest("a").upper())] == ["f1", "f2"]
+    assert [meta["file_id"] for meta in reopened.by_case("c1")] == ["f1", "f3"]
+    assert reopened.get("missing") is None and "missing" not in reopened
+
+
+def test_lookup_cache_is_a_bounded_lru(tmp_path):
+    index = FileIndex(tmp_path / "files.db", cache_size=2)
+    for file_id in ("f1", "f2", "f3"):
+        index.add(file_id, f"blobs/{file_id}", digest(file_id))
+    assert list(index._cache) == ["f2", "f3"]
+
+    assert index.get("f2")["path"] == "blobs/f2"  # hit, now most recent
+    assert index.get("f1")["path"] == "blobs/f1"  # evicted entry is read back from disk
+    assert list(index._cache) == ["f2", "f1"]
+
+    index.remove("f1")
+    assert "f1" not in index
+    assert len(index) == 2
@@ -0,0 +1,49 @@
+import pandas as pd
+
+from app.analytics import BURST_CALL_THRESHOLD, LONG_CALL_THRESHOLD
+from app.incremental_analytics import read_intelligence, refresh_aggregates
+from app.ingestion.bulk_loader import bulk_load_cdr
+from app.models import AnalyticsWatermark
+from app.sql_analytics import analyze_cdr_sql
+
+
+def cdrs(callers, start="2025-01-01 10:00"):
+    """One call per entry of `callers`, a minute apart, with rotating SIMs and handsets."""
+    rows = []
+    for i, caller in enumerate(callers):
+        rows.append({
+            "caller": caller,
+            "callee": "+254799000000",
+            "timestamp": pd.Timestamp(start) + pd.Timedelta(minutes=i),
+            "duration": 4000 if i % 7 == 0 else 60,
+            "imsi": f"imsi{i % 5}",
+            "imei": f"imei{i % 3}",
+            "subscriber_id": f"sub{i % 4}",
+        })
+    return pd.DataFrame(rows)
+
+
+def full_recompute(db):
+    return analyze_cdr_sql(db, LONG_CALL_THRESHOLD, BURST_CALL_THRESHOLD)
+
+
+def incremental(db):
+    return read_intelligence(db, LONG_CALL_THRESHOLD, BURST_CALL_THRESHOLD)
+
+
+def test_second_refresh_folds_only_new_rows(engine, db):
+    bulk_load_cdr([cdrs(["+254700000001"] * 25 + ["+254700000002"] * 5)], engine=engine)
+    assert refresh_aggregates(db) == 30
+    assert incremental(db) == full_recompute(db)
+    assert refresh_aggregates(db) == 0
+
+    # Same hour for caller 2 pushes it over the burst threshold only once both loads are folded
+    bulk_load_cdr([cdrs(["+254700000002"] * 20 + ["+254700000003"] * 3, start="2025-01-01 10:30")],
+                  engine=engine)
+    assert refresh_aggregates(db) == 23
+    assert db.get(AnalyticsWatermark, "cdr_aggregates").last_cdr_id == 53
+
+    result = incremental(db)
+    assert result == full_recompute(db)
+    assert {burst["caller"] for burst in result["burst_calls"]} == {"+254700000001", "+254700000002"}
+    assert result["top_callers"]["+254700000002"] == 25
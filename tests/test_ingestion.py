@@ -0,0 +1,59 @@
+import csv
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from app.ingestion.ingest_pipeline import ingest_cdr_files
+from app.ingestion.parallel import IngestionError
+from app.ingestion.streaming import ParquetSink
+
+
+def write_cdr_csv(path, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["msisdn", "other_party", "timestamp", "duration", "notes"])
+        for i in range(rows):
+            # `notes` is empty (inferred float) in the first chunk and text later
+            note = "" if i < rows // 2 else f"note {i}"
+            writer.writerow([f"0712{i:06d}", "0799000000", "2025-01-01 10:00:00", 10 + i, note])
+
+
+def test_parquet_sink_rolls_over_when_a_column_changes_type(tmp_path):
+    sink = ParquetSink(str(tmp_path / "spool.parquet"))
+    sink.write(pd.DataFrame({"a": [1, 2], "notes": [float("nan")] * 2}))
+    sink.write(pd.DataFrame({"a": [3], "notes": [float("nan")]}))
+    sink.write(pd.DataFrame({"a": [4], "notes": ["x"]}))
+    sink.write(pd.DataFrame({"a": [5], "notes": [None], "extra": ["y"]}))
+    sink.close()
+
+    assert len(sink.paths) == 3
+    frames = [pq.read_table(path).to_pandas() for path in sink.paths]
+    assert [len(frame) for frame in frames] == [3, 1, 1]
+    assert frames[1]["notes"].tolist() == ["x"]
+    assert frames[2]["extra"].tolist() == ["y"]
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_ingest_keeps_rows_when_a_column_changes_type_between_chunks(tmp_path, max_workers):
+    path = tmp_path / "drift.csv"
+    write_cdr_csv(path, 10)
+
+    df = ingest_cdr_files([str(path)], chunk_rows=5, max_workers=max_workers)
+
+    assert len(df) == 10
+    assert df["notes"].dropna().tolist() == [f"note {i}" for i in range(5, 10)]
+
+
+def test_ingest_reports_files_that_fail(tmp_path):
+    good = tmp_path / "good.csv"
+    write_cdr_csv(good, 4)
+    broken = tmp_path / "broken.xlsx"
+    broken.write_bytes(b"not a workbook")
+
+    with pytest.raises(IngestionError) as excinfo:
+        ingest_cdr_files([str(good), str(broken)], max_workers=1)
+    assert list(excinfo.value.errors) == [str(broken)]
+
+    df = ingest_cdr_files([str(good), str(broken)], max_workers=1, skip_errors=True)
+    assert len(df) == 4
@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cdrintel.analytics.intelligence_engine import analyze_cdr
+from cdrintel.storage.compact_frame import CompactCDRFrame
+
+# The fused kernel must report exactly what the three-groupby implementation
+# it replaced did (kept below as the reference), without copying or
+# modifying its input. benchmarks/bench_intelligence_engine.py times both.
+
+
+def synthetic_cdr(rows, callers, days, seed=42, sorted_times=True, categorical=True):
+    rng = np.random.default_rng(seed)
+    start = np.datetime64('2025-01-01T00:00:00')
+    offsets = rng.integers(0, days * 86400, rows)
+    if sorted_times:
+        offsets.sort()
+    # Zipf-like caller popularity, so the top-10 is meaningful
+    popularity = rng.zipf(1.3, rows) % callers
+    numbers = pd.Categorical.from_codes(popularity, [f"+2547{i:08d}" for i in range(callers)])
+    return pd.DataFrame({
+        'msisdn': numbers if categorical else numbers.astype(object),
+        'other_party': rng.integers(0, callers, rows),
+        'duration': rng.integers(1, 900, rows),
+        'timestamp': start + offsets.astype('timedelta64[s]'),
+    })
+
+
+def legacy_analyze_cdr(df):
+    """The engine's aggregation before the fused kernel."""
+    df = df.copy()
+    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+    df["date"] = df["timestamp"].dt.date
+    df["hour"] = df["timestamp"].dt.hour
+    top_callers = (
+        df.groupby("msisdn", observed=True)
+        .agg(total_calls=("msisdn", "count"), total_duration=("duration", "sum"),
+             avg_duration=("duration", "mean"))
+        .sort_values("total_calls", ascending=False)
+        .head(10)
+        .reset_index()
+    )
+    daily_activity = (
+        df.groupby("date")
+        .agg(first_call=("timestamp", "min"), last_call=("timestamp", "max"),
+             total_calls=("msisdn", "count"))
+        .reset_index()
+    )
+    peak_hours = (
+        df.groupby("hour").size().reset_index(name="call_count")
+        .sort_values("call_count", ascending=False)
+    )
+    return {
+        "summary": {
+            "total_calls": len(df),
+            "total_duration": float(df["duration"].sum()),
+            "avg_duration": float(df["duration"].mean()),
+        },
+        "top_communicators": top_callers,
+        "daily_activity": daily_activity,
+        "peak_hours": peak_hours,
+    }
+
+
+def assert_same(legacy, fused, label, df):
+    for key, value in legacy["summary"].items():
+        assert np.isclose(value, fused["summary"][key], equal_nan=True), (label, key)
+
+    # Ties in the top-10 may be ordered differently; every reported caller
+    # must carry the legacy aggregates and the call counts must agree
+    expected = legacy["top_communicators"]
+    got = fused["top_communicators"]
+    assert list(got.columns) == list(expected.columns), label
+    assert got["total_calls"].tolist() == expected["total_calls"].tolist(), (label, "top calls")
+    full = df.groupby("msisdn", observed=True).agg(
+        total_calls=("msisdn", "count"), total_duration=("duration", "sum"),
+        avg_duration=("duration", "mean"),
+    )
+    for row in got.itertuples(index=False):
+        ref = full.loc[row.msisdn]
+        assert ref.total_calls == row.total_calls, (label, row.msisdn)
+        assert np.isclose(ref.total_duration, row.total_duration), (label, row.msisdn)
+        assert np.isclose(ref.avg_duration, row.avg_duration, equal_nan=True), (label, row.msisdn)
+
+    pd.testing.assert_frame_equal(
+        legacy["daily_activity"], fused["daily_activity"], check_dtype=False, obj=f"{label} daily"
+    )
+    expected_hours = legacy["peak_hours"].sort_values(["call_count", "hour"], ascending=[False, True])
+    got_hours = fused["peak_hours"].sort_values(["call_count", "hour"], ascending=[False, True])
+    pd.testing.assert_frame_equal(
+        expected_hours.reset_index(drop=True), got_hours.reset_index(drop=True),
+        check_dtype=False, obj=f"{label} hours",
+    )
+
+
+def regression_cases():
+    base = synthetic_cdr(5_000, 300, 10, seed=7)
+    unsorted = synthetic_cdr(5_000, 300, 10, seed=8, sorted_times=False)
+    plain = synthetic_cdr(5_000, 300, 10, seed=9, categorical=False)
+
+    gaps = plain.copy()
+    gaps.loc[::17, "msisdn"] = None
+    gaps["duration"] = gaps["duration"].astype(float)
+    gaps.loc[::13, "duration"] = np.nan
+    gaps["timestamp"] = gaps["timestamp"].astype(object)
+    gaps.loc[::11, "timestamp"] = None
+
+    strings = base.copy()
+    strings["timestamp"] = strings["timestamp"].dt.strftime("%Y-%m-%d %H:%M:%S")
+
+    ties = pd.DataFrame({
+        "msisdn": ["b", "a", "c", "a", "b", "c"],
+        "other_party": 1,
+        "duration": [10, 20, 30, 40, 50, 60],
+        "timestamp": pd.to_datetime(["2025-01-01 01:00"] * 3 + ["2025-01-02 02:00"] * 3),
+    })
+    pre_epoch = base.assign(timestamp=base["timestamp"] - pd.Timedelta(days=365 * 60))
+    return {
+        "sorted": base, "unsorted": unsorted, "string numbers": plain, "nulls": gaps,
+        "string timestamps": strings, "ties": ties, "pre-1970": pre_epoch,
+    }
+
+
+CASES = regression_cases()
+
+
+
+@pytest.mark.parametrize("label", list(CASES))
+def test_fused_kernel_matches_the_groupby_reference(label):
+    df = CASES[label]
+    assert_same(legacy_analyze_cdr(df), analyze_cdr(df), label, df)
+
+
+@pytest.mark.parametrize("label", list(CASES))
+def test_input_frame_is_not_modified(label):
+    df = CASES[label]
+    before = df.copy()
+    analyze_cdr(df)
+    pd.testing.assert_frame_equal(df, before)
+
+
+def test_compact_frame_input():
+    df = CASES["sorted"].rename(columns={"msisdn": "caller", "other_party": "receiver"})
+    fused = analyze_cdr(CompactCDRFrame.from_frame(df))
+    legacy = legacy_analyze_cdr(CASES["sorted"])
+    assert fused["summary"] == legacy["summary"]
@@ -0,0 +1,92 @@
+import importlib
+import threading
+
+import pandas as pd
+import pytest
+
+from app.ingestion.bulk_loader import bulk_load_cdr
+from app.jobs import DONE, FAILED, JobQueue
+
+
+def cdrs(rows, start=0):
+    return pd.DataFrame({
+        "caller": [f"+2547{i:08d}" for i in range(start, start + rows)],
+        "callee": ["+254799000000"] * rows,
+        "timestamp": pd.date_range("2025-01-01", periods=rows, freq="min"),
+        "duration": [60] * rows,
+    })
+
+
+@pytest.fixture
+def analytics(tmp_path, monkeypatch):
+    """app.routers.analytics on a fresh queue, with a counting stand-in for analyze_cdr_job."""
+    monkeypatch.chdir(tmp_path)  # the router opens its case store in the working directory
+    router = importlib.import_module("app.routers.analytics")
+    runs = []
+
+    def job(mode, case_id, start, end):
+        runs.append((mode, case_id, start, end))
+        return {"run": len(runs)}
+
+    monkeypatch.setattr(router, "queue", JobQueue(max_workers=1))
+    monkeypatch.setattr(router, "analyze_cdr_job", job)
+    monkeypatch.setattr(router, "runs", runs, raising=False)
+    return router
+
+
+def result(job):
+    job.future.result(timeout=5)
+    return job.result
+
+
+def test_same_case_data_mode_and_window_reuse_the_result(analytics, engine, db):
+    bulk_load_cdr([cdrs(10)], engine=engine)
+    first = analytics.submit_analysis(db, "sql", case_id="c1")
+    assert result(first) == {"run": 1}
+
+    again = analytics.submit_analysis(db, "sql", case_id="c1")
+    assert again is first and result(again) == {"run": 1}
+
+    # Any other mode, case or window is a different result
+    assert result(analytics.submit_analysis(db, "pandas", case_id="c1")) == {"run": 2}
+    assert result(analytics.submit_analysis(db, "sql", case_id="c2")) == {"run": 3}
+    assert result(analytics.submit_analysis(db, "sql", case_id="c1", start=pd.Timestamp("2025-01-01"))) == {"run": 4}
+    assert len(analytics.runs) == 4
+
+
+def test_new_data_misses_the_cache(analytics, engine, db):
+    bulk_load_cdr([cdrs(10)], engine=engine)
+    first = analytics.submit_analysis(db, "sql", case_id="c1")
+    assert result(first) == {"run": 1}
+
+    bulk_load_cdr([cdrs(5, start=10)], engine=engine)
+    db.commit()  # end the read snapshot so the new rows are visible
+    second = analytics.submit_analysis(db, "sql", case_id="c1")
+    assert second is not first and second.key != first.key
+    assert result(second) == {"run": 2}
+
+
+def test_running_jobs_are_shared_and_failures_are_not_cached():
+    queue = JobQueue(max_workers=2)
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return "done"
+
+    first = queue.submit("key", slow)
+    assert queue.submit("key", slow) is first
+    release.set()
+    assert first.future.result(timeout=5) == "done" and first.status == DONE
+    assert len(calls) == 1
+
+    def broken():
+        raise RuntimeError("boom")
+
+    failed = queue.submit("bad", broken)
+    with pytest.raises(RuntimeError):
+        failed.future.result(timeout=5)
+    assert failed.status == FAILED and failed.error == "RuntimeError: boom"
+    assert queue.submit("bad", lambda: "ok") is not failed
@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+
+from cdrintel.ingestion.msisdn import canonicalize_msisdn
+
+
+def test_formats_of_one_subscriber_share_a_key():
+    values = ["0712345678", "712345678", "254712345678", "+254 712 345 678", "00254712345678"]
+    assert canonicalize_msisdn(values).tolist() == ["+254712345678"] * 5
+
+
+def test_unmatched_and_missing_values():
+    values = pd.Series(["+44 20 7946 0958", "100", "", None, "n/a", "0712345678"])
+    result = canonicalize_msisdn(values)
+    assert str(result.dtype) == "string"
+    assert result.tolist()[:2] == ["+442079460958", "100"]
+    assert result.iloc[2:5].isna().all()
+    assert result.iloc[5] == "+254712345678"
+
+
+def test_float_column_with_blanks_and_repeats():
+    values = pd.Series([712345678.0, np.nan, 712345678.0], index=[5, 6, 7])
+    result = canonicalize_msisdn(values, default_country="255")
+    assert result.index.tolist() == [5, 6, 7]
+    assert result.tolist() == ["+255712345678", pd.NA, "+255712345678"]
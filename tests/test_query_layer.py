@@ -0,0 +1,47 @@
+import pandas as pd
+import pytest
+
+from cdrintel.storage.compact_frame import CompactCDRFrame
+from dashboard.query_layer import CDRQueryIndex, split_filter_part
+
+
+@pytest.fixture
+def index():
+    df = pd.DataFrame({
+        "caller": ["3211281536", "254700000001", "254711000002"],
+        "receiver": ["254799000000"] * 3,
+        "timestamp": pd.to_datetime(["2025-01-01 10:00", "2025-01-02 11:00", "2025-01-03 12:00"]),
+        "duration": [30, 120, 45],
+    })
+    return CDRQueryIndex(CompactCDRFrame.from_frame(df))
+
+
+def callers(index, filter_query):
+    records, total = index.page(page_size=10, sort_by=[{"column_id": "caller", "direction": "asc"}],
+                                filter_query=filter_query)
+    assert total == len(records)
+    return [record["caller"] for record in records]
+
+
+def test_unquoted_values_are_kept_as_typed():
+    assert split_filter_part("{caller} contains 254") == ("caller", "contains", "254")
+    assert split_filter_part('{caller} eq "254"') == ("caller", "eq", "254")
+
+
+@pytest.mark.parametrize("filter_query", ["{caller} eq 3211281536", "{caller} = 3211281536",
+                                          '{caller} eq "3211281536"'])
+def test_phone_number_equality(index, filter_query):
+    assert callers(index, filter_query) == ["3211281536"]
+
+
+def test_phone_number_contains(index):
+    assert callers(index, "{caller} contains 254") == ["254700000001", "254711000002"]
+
+
+def test_numeric_columns_compare_as_numbers(index):
+    assert callers(index, "{duration} ge 45") == ["254700000001", "254711000002"]
+    assert callers(index, "{duration} lt 100 && {caller} contains 254") == ["254711000002"]
+
+
+def test_datestartswith(index):
+    assert callers(index, "{timestamp} datestartswith 2025-01-02") == ["254700000001"]
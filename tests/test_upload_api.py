@@ -0,0 +1,43 @@
+import hashlib
+import importlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.database import get_db
+from app.models.user import User
+from app.security import get_current_user
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    # The router opens its blob and session stores relative to the working directory
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(tmp_path_factory.mktemp("upload_api"))
+        upload = importlib.import_module("app.routers.upload")
+        api = FastAPI()
+        api.include_router(upload.router)
+        api.dependency_overrides[get_current_user] = lambda: User(username="ana", role="investigator")
+        api.dependency_overrides[get_db] = lambda: None
+        yield TestClient(api)
+
+
+@pytest.mark.parametrize("sha256", ["abc", "z" * 64, "a" * 63, "../" + "a" * 61])
+def test_malformed_declared_sha256_is_a_bad_request(client, sha256):
+    response = client.post("/upload/", params={"case_id": "c1", "purpose": "p", "sha256": sha256},
+                           files={"file": ("calls.csv", b"caller,receiver\n")})
+    assert response.status_code == 400
+
+    response = client.post("/upload/sessions", params={
+        "case_id": "c1", "purpose": "p", "filename": "calls.csv", "total_size": 10, "sha256": sha256,
+    })
+    assert response.status_code == 400
+
+
+def test_declared_sha256_is_case_insensitive():
+    from cdrintel.storage.chunked_upload import is_sha256
+
+    digest = hashlib.sha256(b"x").hexdigest()
+    assert is_sha256(digest) and is_sha256(digest.upper())
+    assert not is_sha256(None) and not is_sha256(digest + "0")